@@ -17,11 +17,19 @@ from pydantic import BaseModel, Field, ConfigDict
 import joblib
 import pandas as pd
 from pathlib import Path
-from typing import Optional
+from typing import List, Optional
 import logging
 from datetime import datetime
+import sys
 import time
 
+# Add project root to path
+project_root = Path(__file__).parent.parent
+if str(project_root) not in sys.path:
+    sys.path.insert(0, str(project_root))
+
+from ml_models.churn_prediction.utils.compiled import load_compiled_predictor
+
 # Setup logging
 logging.basicConfig(
     level=logging.INFO,
@@ -54,8 +62,13 @@ app.add_middleware(
 MODEL_PATH = Path(__file__).parent.parent / "ml_models" / "churn_prediction" / "trained_models" / "random_forest_v1.pkl"
 
 try:
-    model = joblib.load(MODEL_PATH)
-    logger.info(f"✅ Model loaded successfully from {MODEL_PATH}")
+    # Prefer the native library built by compile_models.py; fall back to the pickle
+    model = load_compiled_predictor('random_forest')
+    if model is not None:
+        logger.info(f"✅ Compiled model loaded from {model.libpath}")
+    else:
+        model = joblib.load(MODEL_PATH)
+        logger.info(f"✅ Model loaded successfully from {MODEL_PATH}")
     MODEL_LOADED = True
 except Exception as e:
     logger.error(f"❌ Failed to load model: {e}")
@@ -169,6 +182,32 @@ def encode_persona(persona: str) -> int:
     return mapping.get(persona.lower(), 0)
 
 
+def build_feature_row(features: SessionFeatures) -> dict:
+    """Model input row for one session"""
+    return {
+        'page_views': features.page_views,
+        'products_viewed': features.products_viewed,
+        'unique_products_viewed': features.unique_products_viewed,
+        'searches': features.searches,
+        'cart_additions': features.cart_additions,
+        'cart_removals': features.cart_removals,
+        'cart_value': features.cart_value,
+        'session_duration_seconds': features.session_duration_seconds,
+        'avg_time_per_page': features.avg_time_per_page,
+        'engagement_score': features.engagement_score,
+        'cart_engagement': features.cart_engagement,
+        'time_per_product': features.time_per_product,
+        'cart_to_checkout_rate': features.cart_to_checkout_rate,
+        'pages_per_minute': features.pages_per_minute,
+        'unique_product_ratio': features.unique_product_ratio,
+        'device_type': encode_device(features.device_type),
+        'browser': encode_browser(features.browser),
+        'persona': encode_persona(features.persona),
+        'bounce': int(features.bounce),
+        'checkout_initiated': int(features.checkout_initiated)
+    }
+
+
 def get_risk_level(probability: float) -> tuple:
     """Determine risk level and intervention"""
     if probability >= 0.85:
@@ -242,30 +281,7 @@ async def predict_abandonment(features: SessionFeatures, background_tasks: Backg
     
     try:
         # Prepare features
-        feature_dict = {
-            'page_views': features.page_views,
-            'products_viewed': features.products_viewed,
-            'unique_products_viewed': features.unique_products_viewed,
-            'searches': features.searches,
-            'cart_additions': features.cart_additions,
-            'cart_removals': features.cart_removals,
-            'cart_value': features.cart_value,
-            'session_duration_seconds': features.session_duration_seconds,
-            'avg_time_per_page': features.avg_time_per_page,
-            'engagement_score': features.engagement_score,
-            'cart_engagement': features.cart_engagement,
-            'time_per_product': features.time_per_product,
-            'cart_to_checkout_rate': features.cart_to_checkout_rate,
-            'pages_per_minute': features.pages_per_minute,
-            'unique_product_ratio': features.unique_product_ratio,
-            'device_type': encode_device(features.device_type),
-            'browser': encode_browser(features.browser),
-            'persona': encode_persona(features.persona),
-            'bounce': int(features.bounce),
-            'checkout_initiated': int(features.checkout_initiated)
-        }
-        
-        X = pd.DataFrame([feature_dict])
+        X = pd.DataFrame([build_feature_row(features)])
         
         # Make prediction
         probability = float(model.predict_proba(X)[0][1])
@@ -299,6 +315,54 @@ async def predict_abandonment(features: SessionFeatures, background_tasks: Backg
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/predict_batch", response_model=List[PredictionResponse])
+async def predict_abandonment_batch(sessions: List[SessionFeatures]):
+    """Batch prediction endpoint: one model call for all sessions"""
+    global prediction_count, high_risk_count
+    
+    if not MODEL_LOADED:
+        raise HTTPException(status_code=503, detail="Model not loaded")
+    
+    if not sessions:
+        return []
+    
+    start_time = time.time()
+    
+    try:
+        # One DataFrame and one predict_proba for the whole batch
+        X = pd.DataFrame([build_feature_row(features) for features in sessions])
+        probabilities = model.predict_proba(X)[:, 1]
+        
+        # Latency is shared by the batch, reported per session
+        latency_ms = (time.time() - start_time) * 1000 / len(sessions)
+        
+        responses = []
+        for features, probability in zip(sessions, probabilities.tolist()):
+            risk_level, confidence, intervention = get_risk_level(probability)
+            
+            prediction_count += 1
+            if risk_level in ['HIGH', 'CRITICAL']:
+                high_risk_count += 1
+            
+            responses.append(PredictionResponse(
+                session_id=features.session_id,
+                abandonment_probability=round(probability, 4),
+                will_abandon=probability > 0.5,
+                risk_level=risk_level,
+                confidence=confidence,
+                recommended_intervention=intervention,
+                prediction_time_ms=round(latency_ms, 2)
+            ))
+        
+        logger.info(f"Batch prediction: {len(sessions)} sessions in {latency_ms * len(sessions):.1f} ms")
+        
+        return responses
+    
+    except Exception as e:
+        logger.error(f"Batch prediction error: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+
 # ============================================
 # STARTUP
 # ============================================
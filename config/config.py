@@ -23,6 +23,13 @@ class Config:
     POSTGRES_DB = os.getenv("POSTGRES_DB", "ecommerce_analytics")
     POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
     POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "postgres123")
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "25"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "60"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_BEHIND_PGBOUNCER = os.getenv("DB_BEHIND_PGBOUNCER", "False").lower() == "true"
+    POSTGRES_READ_URL = os.getenv("POSTGRES_READ_URL", "")  # Read replica; empty = use primary
+    DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", "50"))
     
     @property
     def POSTGRES_URL(self):
@@ -5,9 +5,9 @@ API Documentation: https://fakestoreapi.com/docs
 
 import requests
 import logging
+import time
 from typing import List, Optional, Dict, Any
-from datetime import datetime
-import uuid
+from data_ingestion.schemas.event_schemas import PRODUCT_EVENT_SHARD, event_id_counter
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +18,7 @@ class FakeStoreClient:
     BASE_URL = "https://fakestoreapi.com"
     
     def __init__(self):
+        self._event_ids = event_id_counter(PRODUCT_EVENT_SHARD)
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'RealTimeEcommerceAnalytics/1.0'
@@ -127,8 +128,8 @@ class FakeStoreClient:
         import random
         
         event = {
-            "event_id": f"prod_{product['id']}_{uuid.uuid4().hex[:8]}",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "event_id": next(self._event_ids),
+            "timestamp_ns": time.time_ns(),
             "product_id": product.get("id"),
             "title": product.get("title"),
             "price": product.get("price"),
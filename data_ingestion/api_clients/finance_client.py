@@ -9,9 +9,9 @@ Economic indicators help predict:
 """
 
 import logging
+import time
 from typing import Optional, Dict, Any
-from datetime import datetime
-import uuid
+from data_ingestion.schemas.event_schemas import FINANCE_EVENT_SHARD, event_id_counter
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +24,7 @@ class FinanceClient:
     
     def __init__(self):
         """Initialize finance client"""
+        self._event_ids = event_id_counter(FINANCE_EVENT_SHARD)
         try:
             import yfinance as yf
             self.yf = yf
@@ -127,8 +128,8 @@ class FinanceClient:
             Enriched finance event dictionary
         """
         event = {
-            "event_id": f"fin_{uuid.uuid4().hex[:8]}",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "event_id": next(self._event_ids),
+            "timestamp_ns": time.time_ns(),
             "symbol": market_data.get("symbol"),
             "current_price": market_data.get("current_price"),
             "open_price": market_data.get("open_price"),
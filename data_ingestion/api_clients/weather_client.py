@@ -8,9 +8,9 @@ Example: Rain increases umbrella sales, cold weather boosts heater sales.
 
 import requests
 import logging
+import time
 from typing import Optional, Dict, Any
-from datetime import datetime
-import uuid
+from data_ingestion.schemas.event_schemas import WEATHER_EVENT_SHARD, event_id_counter
 from config.config import config
 
 logger = logging.getLogger(__name__)
@@ -28,6 +28,7 @@ class WeatherClient:
         Args:
             api_key: OpenWeatherMap API key (optional, uses config if not provided)
         """
+        self._event_ids = event_id_counter(WEATHER_EVENT_SHARD)
         self.api_key = api_key or config.OPENWEATHER_API_KEY
         self.session = requests.Session()
         self.session.headers.update({
@@ -130,8 +131,8 @@ class WeatherClient:
         wind_data = weather_data.get("wind", {})
         
         event = {
-            "event_id": f"weather_{uuid.uuid4().hex[:8]}",
-            "timestamp": datetime.utcnow().isoformat() + "Z", # Fixed deprecation warning
+            "event_id": next(self._event_ids),
+            "timestamp_ns": time.time_ns(),
             "location": weather_data.get("name", "Unknown"),
             "temperature": main_data.get("temp"),
             "feels_like": main_data.get("feels_like"),
@@ -17,16 +17,52 @@ PORTFOLIO FEATURES:
 """
 
 import logging
+import os
 import random
+from bisect import bisect
+from collections import Counter, deque
+from itertools import accumulate
 import time
-import uuid
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Deque, Optional, Tuple
 from dataclasses import dataclass, field
 from enum import Enum
+from functools import partial
+
+import numpy as np
+
+import sys
+from pathlib import Path
+project_root = str(Path(__file__).parent.parent.parent)
+if project_root not in sys.path:  # Already importable when run from the project root
+    sys.path.insert(0, project_root)
+
+from data_ingestion.schemas.event_schemas import (
+    SIMULATOR_WORKER_SHARD_BASE,
+    USER_EVENT_SHARD,
+    event_dumps,
+    event_id_counter
+)
 
 logger = logging.getLogger(__name__)
 
+# 6 random bytes -> 12 hex characters for session IDs
+_rand_id = partial(os.urandom, 6)
+
+# Number of pre-drawn indices per choice pool refill
+CHOICE_POOL_SIZE = 65536
+
+# Event dictionaries are serialized exactly as every other producer's events
+serialize_event = event_dumps
+
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def epoch_ns(moment: datetime) -> int:
+    """Convert a naive UTC datetime to integer epoch nanoseconds"""
+    return (moment - _EPOCH) // _MICROSECOND * 1000
+
 
 class UserPersona(Enum):
     """Different types of user behavior patterns"""
@@ -46,7 +82,196 @@ class SessionState(Enum):
     RECOVERING = "recovering"              # NEW: Recovering from abandonment after intervention
 
 
-@dataclass
+# Small integer codes for hot-path comparisons.
+# Enum .value strings are only needed for event payloads and logs.
+STATE_CODE = {state: code for code, state in enumerate(SessionState)}
+PERSONA_CODE = {persona: code for code, persona in enumerate(UserPersona)}
+
+STATE_BROWSING = STATE_CODE[SessionState.BROWSING]
+STATE_INTERESTED = STATE_CODE[SessionState.INTERESTED]
+STATE_CART_ACTIVE = STATE_CODE[SessionState.CART_ACTIVE]
+STATE_CHECKOUT_INITIATED = STATE_CODE[SessionState.CHECKOUT_INITIATED]
+STATE_PURCHASED = STATE_CODE[SessionState.PURCHASED]
+STATE_ABANDONED = STATE_CODE[SessionState.ABANDONED]
+STATE_RECOVERING = STATE_CODE[SessionState.RECOVERING]
+
+PERSONA_WINDOW_SHOPPER = PERSONA_CODE[UserPersona.WINDOW_SHOPPER]
+PERSONA_INTENT_BUYER = PERSONA_CODE[UserPersona.INTENT_BUYER]
+PERSONA_CART_ABANDONER = PERSONA_CODE[UserPersona.CART_ABANDONER]
+
+
+def _next_action_weights(state: int, persona: int) -> Dict[str, int]:
+    """
+    Next-action weights for a session state/persona combination.
+    This creates realistic user journeys.
+    
+    NEW: RECOVERING sessions have high probability to purchase.
+    
+    Args:
+        state: Session state code
+        persona: User persona code
+        
+    Returns:
+        Mapping of action string to relative weight
+    """
+    # NEW: RECOVERING state - user came back after intervention
+    if state == STATE_RECOVERING:
+        # High probability of purchase after recovery
+        return {
+            'checkout': 40,
+            'purchase': 50,  # 50% chance to complete purchase
+            'product_view': 5,
+            'page_view': 5
+        }
+    
+    # BROWSING state
+    if state == STATE_BROWSING:
+        weights = {
+            'page_view': 40,
+            'product_view': 35,
+            'search': 25
+        }
+    
+    # INTERESTED state (viewed multiple products)
+    elif state == STATE_INTERESTED:
+        if persona == PERSONA_INTENT_BUYER:
+            # Intent buyers quickly add to cart
+            weights = {
+                'product_view': 30,
+                'add_to_cart': 50,
+                'page_view': 15,
+                'search': 5
+            }
+        elif persona == PERSONA_CART_ABANDONER:
+            # Cart abandoners add to cart but then browse
+            weights = {
+                'product_view': 35,
+                'add_to_cart': 40,
+                'page_view': 20,
+                'search': 5
+            }
+        else:  # WINDOW_SHOPPER
+            # Window shoppers keep browsing
+            weights = {
+                'product_view': 45,
+                'page_view': 30,
+                'add_to_cart': 15,
+                'search': 10
+            }
+    
+    # CART_ACTIVE state
+    elif state == STATE_CART_ACTIVE:
+        if persona == PERSONA_INTENT_BUYER:
+            # Intent buyers go to checkout quickly
+            weights = {
+                'checkout': 60,
+                'add_to_cart': 20,
+                'product_view': 10,
+                'page_view': 5,
+                'remove_from_cart': 5
+            }
+        elif persona == PERSONA_CART_ABANDONER:
+            # Cart abandoners browse more, rarely checkout
+            weights = {
+                'page_view': 35,
+                'product_view': 30,
+                'add_to_cart': 15,
+                'remove_from_cart': 15,
+                'checkout': 5
+            }
+        else:  # WINDOW_SHOPPER
+            # Window shoppers hesitant to checkout
+            weights = {
+                'page_view': 30,
+                'product_view': 25,
+                'add_to_cart': 20,
+                'checkout': 15,
+                'remove_from_cart': 10
+            }
+    
+    # CHECKOUT_INITIATED state
+    elif state == STATE_CHECKOUT_INITIATED:
+        if persona == PERSONA_INTENT_BUYER:
+            # Intent buyers complete purchase
+            weights = {
+                'purchase': 85,
+                'page_view': 10,
+                'remove_from_cart': 5
+            }
+        else:
+            # Others might abandon at checkout
+            weights = {
+                'purchase': 40,
+                'page_view': 30,
+                'remove_from_cart': 20,
+                'product_view': 10
+            }
+    
+    # Default fallback
+    else:
+        weights = {
+            'page_view': 50,
+            'product_view': 30,
+            'search': 20
+        }
+    
+    return weights
+
+
+# Prebuilt (actions, cumulative weights) tuples for every state/persona combination
+NEXT_ACTION_TABLE = {}
+for _state_code in STATE_CODE.values():
+    for _persona_code in PERSONA_CODE.values():
+        _weights = _next_action_weights(_state_code, _persona_code)
+        NEXT_ACTION_TABLE[_state_code, _persona_code] = (
+            tuple(_weights), tuple(accumulate(_weights.values()))
+        )
+
+
+class ChoicePool:
+    """
+    Pre-batched sampler over a fixed sequence of choices.
+    Draws CHOICE_POOL_SIZE indices from NumPy at once and hands them out
+    one by one, amortizing the RNG cost across many events.
+    """
+    
+    def __init__(self, choices, weights: Optional[List[float]] = None):
+        """
+        Initialize choice pool.
+        
+        Args:
+            choices: Sequence of values to sample from (at most 256)
+            weights: Optional relative weights (uniform if not provided)
+        """
+        self.choices = tuple(choices)
+        if weights is not None:
+            total = float(sum(weights))
+            self._probabilities = [w / total for w in weights]
+        else:
+            self._probabilities = None
+        self._pool = bytearray()
+        self._index = 0
+    
+    def _refill(self):
+        """Draw a fresh batch of indices"""
+        if self._probabilities is None:
+            indices = np.random.randint(0, len(self.choices), CHOICE_POOL_SIZE, dtype=np.uint8)
+        else:
+            indices = np.random.choice(
+                len(self.choices), CHOICE_POOL_SIZE, p=self._probabilities
+            ).astype(np.uint8)
+        self._pool = bytearray(indices.tobytes())
+        self._index = CHOICE_POOL_SIZE
+    
+    def next(self):
+        """Return the next sampled choice"""
+        if self._index == 0:
+            self._refill()
+        self._index -= 1
+        return self.choices[self._pool[self._index]]
+
+
+@dataclass(slots=True)
 class UserSession:
     """Represents an active user session with state tracking"""
     session_id: str
@@ -56,8 +281,9 @@ class UserSession:
     persona: UserPersona
     state: SessionState = SessionState.BROWSING
     page_views: int = 0
-    products_viewed: List[int] = field(default_factory=list)
+    products_viewed: Deque[int] = field(default_factory=lambda: deque(maxlen=5))  # Last 5 viewed
     cart_items: List[Dict[str, Any]] = field(default_factory=list)
+    cart_value: float = 0.0  # Running total of cart_items, kept in sync by the simulator
     device_type: str = "desktop"
     is_active: bool = True
     converted: bool = False
@@ -71,24 +297,40 @@ class UserSession:
     intervention_time: Optional[datetime] = None
     will_recover: bool = False  # Set to True if user will come back
     
+    # Kafka partition key, encoded once per session
+    session_id_bytes: bytes = b""
+    
+    # Integer codes mirroring state/persona (kept in sync by the simulator)
+    state_code: int = field(default=STATE_BROWSING, init=False, repr=False)
+    persona_code: int = field(default=PERSONA_WINDOW_SHOPPER, init=False, repr=False)
+    
+    def __post_init__(self):
+        self.state_code = STATE_CODE[self.state]
+        self.persona_code = PERSONA_CODE[self.persona]
+    
     def calculate_session_duration(self) -> int:
         """Calculate session duration in seconds"""
         return int((self.last_activity - self.start_time).total_seconds())
     
     def get_cart_value(self) -> float:
-        """Calculate total cart value"""
-        return sum(item['price'] * item['quantity'] for item in self.cart_items)
+        """Get total cart value"""
+        return self.cart_value
     
-    def time_since_last_activity(self) -> int:
+    def time_since_last_activity(self, now: Optional[datetime] = None) -> int:
         """Calculate seconds since last activity"""
-        return int((datetime.utcnow() - self.last_activity).total_seconds())
+        return int(((now or datetime.utcnow()) - self.last_activity).total_seconds())
     
-    def has_abandoned_cart(self, inactivity_threshold: int = 900) -> bool:
+    def has_abandoned_cart(
+        self,
+        inactivity_threshold: int = 900,
+        now: Optional[datetime] = None
+    ) -> bool:
         """
         Check if cart should be considered abandoned (15 min default).
         
         Args:
             inactivity_threshold: Seconds of inactivity to consider abandoned
+            now: Current UTC time (looked up if not provided)
             
         Returns:
             True if cart is abandoned
@@ -96,7 +338,7 @@ class UserSession:
         return (
             len(self.cart_items) > 0 
             and not self.converted
-            and self.time_since_last_activity() >= inactivity_threshold
+            and self.time_since_last_activity(now) >= inactivity_threshold
         )
 
 
@@ -112,19 +354,25 @@ class EventSimulator:
         UserPersona.INTENT_BUYER: 25,
         UserPersona.CART_ABANDONER: 15
     }
+    PERSONA_KEYS = tuple(PERSONA_WEIGHTS)
+    PERSONA_CUM_WEIGHTS = tuple(accumulate(PERSONA_WEIGHTS.values()))
+    
+    # Items added per cart event
+    QUANTITIES = (1, 2, 3)
+    QUANTITY_CUM_WEIGHTS = tuple(accumulate((70, 20, 10)))
     
     # Device type distribution
-    DEVICE_TYPES = ['desktop', 'mobile', 'tablet']
-    DEVICE_WEIGHTS = [50, 40, 10]
+    DEVICE_TYPES = ('desktop', 'mobile', 'tablet')
+    DEVICE_WEIGHTS = (50, 40, 10)
     
     # Categories (matching Fake Store API)
-    CATEGORIES = ['electronics', 'jewelery', "men's clothing", "women's clothing"]
+    CATEGORIES = ('electronics', 'jewelery', "men's clothing", "women's clothing")
     
     # Browser types
-    BROWSERS = ['Chrome', 'Firefox', 'Safari', 'Edge', 'Opera']
+    BROWSERS = ('Chrome', 'Firefox', 'Safari', 'Edge', 'Opera')
     
     # Cart abandonment reasons
-    ABANDONMENT_REASONS = [
+    ABANDONMENT_REASONS = (
         'high_price',
         'unexpected_shipping_cost',
         'comparison_shopping',
@@ -133,7 +381,25 @@ class EventSimulator:
         'payment_concerns',
         'slow_checkout',
         'needed_more_time'
-    ]
+    )
+    
+    # Reason subsets used for high value carts and cart abandoner persona
+    PRICE_ABANDONMENT_REASONS = ('high_price', 'unexpected_shipping_cost', 'payment_concerns')
+    BROWSING_ABANDONMENT_REASONS = ('just_browsing', 'comparison_shopping', 'found_better_deal')
+    
+    # Payment methods
+    PAYMENT_METHODS = ('credit_card', 'debit_card', 'paypal', 'apple_pay')
+    
+    # Pages visited per session state
+    CART_PAGES = ('/cart', '/products', '/checkout')
+    INTERESTED_PAGES = ('/products', '/category', '/deals')
+    BROWSING_PAGES = ('/home', '/products', '/about', '/deals', '/categories')
+    
+    # Search queries
+    SEARCH_QUERIES = (
+        'laptop', 'phone', 'headphones', 'backpack', 'watch',
+        'shoes', 'jacket', 'dress', 'ring', 'necklace', 'shirt'
+    )
     
     # Time delays between actions (seconds) - min, max
     ACTION_DELAYS = {
@@ -144,18 +410,46 @@ class EventSimulator:
         'purchase': (30, 120)
     }
     
-    # Cart abandonment threshold (15-20 minutes in seconds)
-    CART_ABANDONMENT_THRESHOLD = random.randint(900, 1200)  # 15-20 min
-    
     # NEW: Intervention recovery settings
     INTERVENTION_RECOVERY_RATE = 0.15  # 15% of high-risk users will recover
     RECOVERY_DELAY_MIN = 300  # 5 minutes minimum before recovery
     RECOVERY_DELAY_MAX = 600  # 10 minutes maximum before recovery
     
+    # Number of recent events kept for inspection
+    RECENT_EVENTS_MAXLEN = 1000
+    
+    # Backfill mode: aggregate event mix (matches the streaming simulator's
+    # long-run output) and the session state reported for each event type
+    BACKFILL_EVENT_WEIGHTS = {
+        'page_view': 26,
+        'product_view': 28,
+        'search': 8,
+        'add_to_cart': 11,
+        'remove_from_cart': 4,
+        'checkout_initiated': 4,
+        'purchase': 3,
+        'session_start': 6,
+        'session_end': 6
+    }
+    BACKFILL_EVENT_STATES = {
+        'page_view': SessionState.BROWSING.value,
+        'product_view': SessionState.INTERESTED.value,
+        'search': SessionState.BROWSING.value,
+        'add_to_cart': SessionState.CART_ACTIVE.value,
+        'remove_from_cart': SessionState.CART_ACTIVE.value,
+        'checkout_initiated': SessionState.CHECKOUT_INITIATED.value,
+        'purchase': SessionState.PURCHASED.value,
+        'session_start': SessionState.BROWSING.value,
+        'session_end': SessionState.BROWSING.value
+    }
+    
     def __init__(
         self, 
         num_users: int = 10, 
-        products: List[Dict[str, Any]] = None
+        products: List[Dict[str, Any]] = None,
+        cart_abandonment_threshold: int = 900,
+        user_id_start: int = 1,
+        worker_id: Optional[int] = None
     ):
         """
         Initialize event simulator.
@@ -163,18 +457,72 @@ class EventSimulator:
         Args:
             num_users: Number of simulated users
             products: List of product dictionaries from API
+            cart_abandonment_threshold: Seconds of cart inactivity before abandonment (15 min default)
+            user_id_start: First user ID of the simulated range
+            worker_id: Optional worker ID used to prefix session IDs and pick the event ID shard when sharded
         """
         self.num_users = num_users
+        self.user_id_start = user_id_start
+        self.user_id_end = user_id_start + num_users - 1
+        self.session_prefix = f"sess_w{worker_id}_" if worker_id is not None else "sess_"
+        self._event_ids = event_id_counter(
+            USER_EVENT_SHARD if worker_id is None else SIMULATOR_WORKER_SHARD_BASE + worker_id
+        )
         self.products = products or []
+        self._products_tuple = tuple(self.products)
+        
+        # Product lookup indexes (by ID for cart events, by category for intent buyers)
+        self._products_by_id: Dict[Any, Dict[str, Any]] = {p['id']: p for p in self.products}
+        self._products_by_category: Dict[str, tuple] = {}
+        for product in self.products:
+            self._products_by_category.setdefault(product.get('category'), []).append(product)
+        self._products_by_category = {
+            category: tuple(items) for category, items in self._products_by_category.items()
+        }
+        
+        self.cart_abandonment_threshold = cart_abandonment_threshold
         self.active_sessions: Dict[str, UserSession] = {}
-        self.all_events: List[Dict[str, Any]] = []
         
-        # Track last event time per session for realistic timing
-        self.last_event_time: Dict[str, datetime] = {}
+        # List-backed mirror of active_sessions for O(1) random selection
+        self._session_list: List[UserSession] = []
+        self._session_idx: Dict[str, int] = {}
+        
+        # Running event counters (statistics) and a bounded window of recent events
+        self.event_counts: Counter = Counter()
+        self.persona_counts: Counter = Counter()
+        self.total_events = 0
+        self.recent_events: deque = deque(maxlen=self.RECENT_EVENTS_MAXLEN)
+        self._last_event_key = b""
         
         # NEW: Track sessions waiting for recovery
         self.recovery_queue: List[UserSession] = []
         
+        # Ended sessions kept for reuse by create_session
+        self._session_pool: List[UserSession] = []
+        
+        # Action name -> simulate_* handler
+        self._dispatch = {
+            'page_view': self.simulate_page_view,
+            'product_view': self.simulate_product_view,
+            'add_to_cart': self.simulate_add_to_cart,
+            'remove_from_cart': self.simulate_remove_from_cart,
+            'checkout': self.simulate_checkout_initiated,
+            'purchase': self.simulate_purchase,
+            'search': self.simulate_search
+        }
+        
+        # Pre-batched samplers for the fixed per-event choices
+        self._browser_pool = ChoicePool(self.BROWSERS)
+        self._device_pool = ChoicePool(self.DEVICE_TYPES, self.DEVICE_WEIGHTS)
+        self._payment_pool = ChoicePool(self.PAYMENT_METHODS)
+        self._abandonment_pool = ChoicePool(self.ABANDONMENT_REASONS)
+        self._price_abandonment_pool = ChoicePool(self.PRICE_ABANDONMENT_REASONS)
+        self._browsing_abandonment_pool = ChoicePool(self.BROWSING_ABANDONMENT_REASONS)
+        self._cart_pages_pool = ChoicePool(self.CART_PAGES)
+        self._interested_pages_pool = ChoicePool(self.INTERESTED_PAGES)
+        self._browsing_pages_pool = ChoicePool(self.BROWSING_PAGES)
+        self._search_query_pool = ChoicePool(self.SEARCH_QUERIES)
+        
         logger.info(
             f"Event simulator initialized with {num_users} users and "
             f"{len(products)} products"
@@ -182,9 +530,7 @@ class EventSimulator:
     
     def _select_persona(self) -> UserPersona:
         """Select user persona based on distribution"""
-        personas = list(self.PERSONA_WEIGHTS.keys())
-        weights = list(self.PERSONA_WEIGHTS.values())
-        return random.choices(personas, weights=weights)[0]
+        return random.choices(self.PERSONA_KEYS, cum_weights=self.PERSONA_CUM_WEIGHTS, k=1)[0]
     
     def create_session(self, user_id: int) -> UserSession:
         """
@@ -196,24 +542,32 @@ class EventSimulator:
         Returns:
             UserSession object
         """
-        session_id = f"sess_{uuid.uuid4().hex[:12]}"
-        device_type = random.choices(self.DEVICE_TYPES, weights=self.DEVICE_WEIGHTS)[0]
+        session_id = self.session_prefix + _rand_id().hex()
+        device_type = self._device_pool.next()
         persona = self._select_persona()
         
-        session = UserSession(
+        now = datetime.utcnow()
+        session_fields = dict(
             session_id=session_id,
             user_id=user_id,
-            start_time=datetime.utcnow(),
-            last_activity=datetime.utcnow(),
+            start_time=now,
+            last_activity=now,
             device_type=device_type,
             persona=persona
         )
         
-        self.active_sessions[session_id] = session
-        self.last_event_time[session_id] = datetime.utcnow()
+        if self._session_pool:
+            # Reuse an ended session shell; __init__ resets every field in place
+            session = self._session_pool.pop()
+            session.__init__(**session_fields)
+        else:
+            session = UserSession(**session_fields)
+        session.session_id_bytes = session_id.encode('ascii')
+        
+        self._add_active_session(session)
         
         # Generate session start event
-        event = self._create_event('session_start', session, persona=persona.value)
+        event = self._create_event('session_start', session, now=now, persona=persona.value)
         
         logger.debug(f"Created session {session_id} for user {user_id} ({persona.value})")
         return session
@@ -223,6 +577,7 @@ class EventSimulator:
         event_type: str, 
         session: UserSession,
         product: Optional[Dict[str, Any]] = None,
+        now: Optional[datetime] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -232,19 +587,20 @@ class EventSimulator:
             event_type: Type of event
             session: UserSession object
             product: Optional product dictionary
+            now: Event timestamp (current UTC time if not provided)
             **kwargs: Additional event data
             
         Returns:
             Event dictionary
         """
         event = {
-            "event_id": f"evt_{uuid.uuid4().hex[:12]}",
-            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "event_id": next(self._event_ids),
+            "timestamp_ns": epoch_ns(now) if now else time.time_ns(),
             "user_id": session.user_id,
             "session_id": session.session_id,
             "event_type": event_type,
             "device_type": session.device_type,
-            "browser": random.choice(self.BROWSERS),
+            "browser": self._browser_pool.next(),
             "session_state": session.state.value
         }
         
@@ -259,39 +615,66 @@ class EventSimulator:
         # Add any additional data
         event.update(kwargs)
         
-        self.all_events.append(event)
+        self.total_events += 1
+        self.event_counts[event_type] += 1
+        if event_type == 'session_start':
+            self.persona_counts[session.persona] += 1
+        self.recent_events.append(event)
+        self._last_event_key = session.session_id_bytes
         return event
     
+    def _add_active_session(self, session: UserSession):
+        """Register a session as active"""
+        self.active_sessions[session.session_id] = session
+        self._session_idx[session.session_id] = len(self._session_list)
+        self._session_list.append(session)
+    
+    def _remove_active_session(self, session: UserSession):
+        """Unregister an active session (swap-pop from the session list)"""
+        del self.active_sessions[session.session_id]
+        index = self._session_idx.pop(session.session_id)
+        last = self._session_list.pop()
+        if last is not session:
+            self._session_list[index] = last
+            self._session_idx[last.session_id] = index
+    
+    def _touch(self, session: UserSession) -> datetime:
+        """Record activity on a session and return its timestamp"""
+        now = datetime.utcnow()
+        session.last_activity = now
+        return now
+    
     def _update_session_state(self, session: UserSession, new_state: SessionState):
         """Update session state with logging"""
         old_state = session.state
         session.state = new_state
+        session.state_code = STATE_CODE[new_state]
         logger.debug(f"Session {session.session_id} state: {old_state.value} → {new_state.value}")
     
     def simulate_page_view(self, session: UserSession) -> Dict[str, Any]:
         """Simulate a page view event"""
         session.page_views += 1
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        now = self._touch(session)
         
         # Different pages based on state
-        if session.state == SessionState.CART_ACTIVE:
-            pages = ['/cart', '/products', '/checkout']
-        elif session.state == SessionState.INTERESTED:
-            pages = ['/products', '/category', '/deals']
+        if session.state_code == STATE_CART_ACTIVE:
+            pages = self._cart_pages_pool
+        elif session.state_code == STATE_INTERESTED:
+            pages = self._interested_pages_pool
         else:
-            pages = ['/home', '/products', '/about', '/deals', '/categories']
+            pages = self._browsing_pages_pool
         
         event = self._create_event(
             'page_view',
             session,
-            page_url=random.choice(pages),
+            now=now,
+            page_url=pages.next(),
             referrer='/home' if session.page_views > 1 else 'google.com',
             time_on_page=random.randint(5, 120)
         )
         
         # State transition: After 3+ page views, become interested
-        if session.page_views >= 3 and session.state == SessionState.BROWSING:
+        if session.page_views >= 3 and session.state_code == STATE_BROWSING:
             self._update_session_state(session, SessionState.INTERESTED)
         
         return event
@@ -302,31 +685,31 @@ class EventSimulator:
             return self.simulate_page_view(session)
         
         # Persona-based product selection
-        if session.persona == UserPersona.INTENT_BUYER:
+        if session.persona_code == PERSONA_INTENT_BUYER:
             # Intent buyers focus on specific categories
             if random.random() < 0.7:
                 category = random.choice(self.CATEGORIES)
-                category_products = [p for p in self.products if p.get('category') == category]
-                product = random.choice(category_products) if category_products else random.choice(self.products)
+                category_products = self._products_by_category.get(category)
+                product = random.choice(category_products) if category_products else random.choice(self._products_tuple)
             else:
-                product = random.choice(self.products)
+                product = random.choice(self._products_tuple)
         else:
             # Window shoppers and abandoners browse randomly
-            product = random.choice(self.products)
+            product = random.choice(self._products_tuple)
         
         session.products_viewed.append(product['id'])
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        now = self._touch(session)
         
         event = self._create_event(
             'product_view',
             session,
+            now=now,
             product=product,
             time_on_page=random.randint(10, 180)
         )
         
         # State transition: Viewed 2+ products → interested
-        if len(session.products_viewed) >= 2 and session.state == SessionState.BROWSING:
+        if len(session.products_viewed) >= 2 and session.state_code == STATE_BROWSING:
             self._update_session_state(session, SessionState.INTERESTED)
         
         return event
@@ -343,12 +726,12 @@ class EventSimulator:
         
         # Higher probability to add recently viewed products (70%)
         if session.products_viewed and random.random() < 0.7:
-            product_id = random.choice(session.products_viewed[-5:])
-            product = next((p for p in self.products if p['id'] == product_id), random.choice(self.products))
+            product_id = random.choice(session.products_viewed)
+            product = self._products_by_id.get(product_id) or random.choice(self._products_tuple)
         else:
-            product = random.choice(self.products)
+            product = random.choice(self._products_tuple)
         
-        quantity = random.choices([1, 2, 3], weights=[70, 20, 10])[0]
+        quantity = random.choices(self.QUANTITIES, cum_weights=self.QUANTITY_CUM_WEIGHTS, k=1)[0]
         
         # Add to session cart
         cart_item = {
@@ -357,16 +740,17 @@ class EventSimulator:
             'quantity': quantity
         }
         session.cart_items.append(cart_item)
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        session.cart_value += product['price'] * quantity
+        now = self._touch(session)
         
         # Track when cart was created
         if session.cart_created_at is None:
-            session.cart_created_at = datetime.utcnow()
+            session.cart_created_at = now
         
         event = self._create_event(
             'add_to_cart',
             session,
+            now=now,
             product=product,
             quantity=quantity,
             cart_value=session.get_cart_value()
@@ -384,15 +768,19 @@ class EventSimulator:
         
         # Remove random item from cart
         removed_item = session.cart_items.pop(random.randint(0, len(session.cart_items) - 1))
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        if session.cart_items:
+            session.cart_value -= removed_item['price'] * removed_item['quantity']
+        else:
+            session.cart_value = 0.0
+        now = self._touch(session)
         
         # Find product details
-        product = next((p for p in self.products if p['id'] == removed_item['product_id']), None)
+        product = self._products_by_id.get(removed_item['product_id'])
         
         event = self._create_event(
             'remove_from_cart',
             session,
+            now=now,
             product=product,
             quantity=removed_item['quantity'],
             cart_value=session.get_cart_value()
@@ -411,12 +799,12 @@ class EventSimulator:
             logger.debug(f"Session {session.session_id} tried to checkout empty cart - adding product first")
             return self.simulate_add_to_cart(session)
         
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        now = self._touch(session)
         
         event = self._create_event(
             'checkout_initiated',
             session,
+            now=now,
             cart_value=session.get_cart_value(),
             items_count=len(session.cart_items)
         )
@@ -436,15 +824,15 @@ class EventSimulator:
         
         total_value = session.get_cart_value()
         session.converted = True
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        now = self._touch(session)
         
         event = self._create_event(
             'purchase',
             session,
+            now=now,
             quantity=len(session.cart_items),
             cart_value=total_value,
-            payment_method=random.choice(['credit_card', 'debit_card', 'paypal', 'apple_pay']),
+            payment_method=self._payment_pool.next(),
             recovered_from_abandonment=session.received_intervention  # NEW: Track if this was a recovery
         )
         
@@ -453,6 +841,7 @@ class EventSimulator:
         
         # Clear cart after purchase
         session.cart_items = []
+        session.cart_value = 0.0
         
         # Log recovery success
         if session.received_intervention:
@@ -463,7 +852,11 @@ class EventSimulator:
         
         return event
     
-    def simulate_cart_abandoned(self, session: UserSession) -> Dict[str, Any]:
+    def simulate_cart_abandoned(
+        self,
+        session: UserSession,
+        now: Optional[datetime] = None
+    ) -> Dict[str, Any]:
         """
         Simulate cart abandonment event.
         Called when cart has been inactive for threshold period.
@@ -473,26 +866,28 @@ class EventSimulator:
         if not session.cart_items:
             return None
         
+        now = now or datetime.utcnow()
+        
         # Select abandonment reason based on cart value and persona
         cart_value = session.get_cart_value()
         
         if cart_value > 100:
             # High value carts - price-related abandonment
-            reason = random.choice(['high_price', 'unexpected_shipping_cost', 'payment_concerns'])
-        elif session.persona == UserPersona.CART_ABANDONER:
-            reason = random.choice(['just_browsing', 'comparison_shopping', 'found_better_deal'])
+            reason = self._price_abandonment_pool.next()
+        elif session.persona_code == PERSONA_CART_ABANDONER:
+            reason = self._browsing_abandonment_pool.next()
         else:
-            reason = random.choice(self.ABANDONMENT_REASONS)
+            reason = self._abandonment_pool.next()
         
         session.abandonment_reason = reason
-        session.last_activity = datetime.utcnow()
+        session.last_activity = now
         
         # NEW: Determine if this session will recover (15% chance if high-risk)
         if cart_value > 50:  # Only high-value carts get recovery simulation
             if random.random() < self.INTERVENTION_RECOVERY_RATE:
                 session.will_recover = True
                 session.received_intervention = True
-                session.intervention_time = datetime.utcnow()
+                session.intervention_time = now
                 # Add to recovery queue
                 self.recovery_queue.append(session)
                 logger.info(
@@ -503,10 +898,11 @@ class EventSimulator:
         event = self._create_event(
             'cart_abandoned',
             session,
+            now=now,
             cart_value=cart_value,
             items_count=len(session.cart_items),
             abandonment_reason=reason,
-            time_in_cart_seconds=int((datetime.utcnow() - session.cart_created_at).total_seconds()) if session.cart_created_at else 0,
+            time_in_cart_seconds=int((now - session.cart_created_at).total_seconds()) if session.cart_created_at else 0,
             device_type=session.device_type
         )
         
@@ -527,9 +923,13 @@ class EventSimulator:
         Returns:
             Recovery event if a session is ready to recover
         """
+        if not self.recovery_queue:
+            return None
+        
         now = datetime.utcnow()
         
-        for session in list(self.recovery_queue):
+        # No copy needed: we return right after removing a session
+        for session in self.recovery_queue:
             if not session.intervention_time:
                 continue
             
@@ -542,12 +942,12 @@ class EventSimulator:
                 
                 # Reactivate session
                 session.state = SessionState.RECOVERING
+                session.state_code = STATE_RECOVERING
                 session.last_activity = now
-                self.last_event_time[session.session_id] = now
                 
                 # Add back to active sessions if not there
                 if session.session_id not in self.active_sessions:
-                    self.active_sessions[session.session_id] = session
+                    self._add_active_session(session)
                 
                 logger.info(
                     f"🔄 RECOVERY INITIATED: Session {session.session_id} returning "
@@ -558,6 +958,7 @@ class EventSimulator:
                 event = self._create_event(
                     'session_recovered',
                     session,
+                    now=now,
                     recovery_time_seconds=int(time_since_intervention),
                     cart_value=session.get_cart_value()
                 )
@@ -568,18 +969,13 @@ class EventSimulator:
     
     def simulate_search(self, session: UserSession) -> Dict[str, Any]:
         """Simulate a search event"""
-        search_queries = [
-            'laptop', 'phone', 'headphones', 'backpack', 'watch',
-            'shoes', 'jacket', 'dress', 'ring', 'necklace', 'shirt'
-        ]
-        
-        session.last_activity = datetime.utcnow()
-        self.last_event_time[session.session_id] = datetime.utcnow()
+        now = self._touch(session)
         
         event = self._create_event(
             'search',
             session,
-            search_query=random.choice(search_queries),
+            now=now,
+            search_query=self._search_query_pool.next(),
             results_count=random.randint(5, 50)
         )
         
@@ -595,34 +991,35 @@ class EventSimulator:
         Returns:
             True if session should end
         """
-        session_duration = session.calculate_session_duration()
-        
         # End session if purchased (80% chance for intent buyers, 95% for others)
         if session.converted:
-            if session.persona == UserPersona.INTENT_BUYER:
+            if session.persona_code == PERSONA_INTENT_BUYER:
                 return random.random() < 0.8
             return random.random() < 0.95
         
         # End session if cart abandoned (but not if recovering)
-        if session.state == SessionState.ABANDONED and not session.will_recover:
+        if session.state_code == STATE_ABANDONED and not session.will_recover:
             return random.random() < 0.9
         
         # Don't end sessions that are recovering
-        if session.state == SessionState.RECOVERING:
+        if session.state_code == STATE_RECOVERING:
             return False
         
+        # Only needed past the early exits above
+        session_duration = session.calculate_session_duration()
+        
         # Persona-based session duration preferences
-        if session.persona == UserPersona.WINDOW_SHOPPER:
+        if session.persona_code == PERSONA_WINDOW_SHOPPER:
             # Window shoppers stay longer
             if session_duration > 1800:  # 30 minutes
                 return random.random() < 0.5
-        elif session.persona == UserPersona.INTENT_BUYER:
+        elif session.persona_code == PERSONA_INTENT_BUYER:
             # Intent buyers are quick
             if session_duration > 600:  # 10 minutes
                 return random.random() < 0.6
         else:  # CART_ABANDONER
             # Cart abandoners leave after adding items
-            if session.state == SessionState.CART_ACTIVE and session_duration > 300:
+            if session.state_code == STATE_CART_ACTIVE and session_duration > 300:
                 return random.random() < 0.4
         
         # General timeouts
@@ -634,12 +1031,13 @@ class EventSimulator:
     def end_session(self, session: UserSession) -> Dict[str, Any]:
         """End a user session"""
         session.is_active = False
+        session_duration = session.calculate_session_duration()
         
         event = self._create_event(
             'session_end',
             session,
             total_page_views=session.page_views,
-            session_duration=session.calculate_session_duration(),
+            session_duration=session_duration,
             converted=session.converted,
             cart_abandoned=len(session.cart_items) > 0 and not session.converted,
             abandonment_reason=session.abandonment_reason,
@@ -649,17 +1047,22 @@ class EventSimulator:
         
         # Remove from active sessions
         if session.session_id in self.active_sessions:
-            del self.active_sessions[session.session_id]
-        if session.session_id in self.last_event_time:
-            del self.last_event_time[session.session_id]
+            self._remove_active_session(session)
         
         logger.debug(
             f"Session {session.session_id} ended. "
-            f"Duration: {session.calculate_session_duration()}s, "
+            f"Duration: {session_duration}s, "
             f"Converted: {session.converted}, "
             f"Persona: {session.persona.value}"
         )
         
+        # Recycle the session object unless it is still waiting to recover
+        if (
+            len(self._session_pool) < self.num_users
+            and not any(queued is session for queued in self.recovery_queue)
+        ):
+            self._session_pool.append(session)
+        
         return event
     
     def check_abandoned_carts(self) -> List[Dict[str, Any]]:
@@ -671,11 +1074,13 @@ class EventSimulator:
             List of cart_abandoned events
         """
         abandoned_events = []
+        now = datetime.utcnow()
         
-        for session_id, session in list(self.active_sessions.items()):
+        # Abandonment never removes sessions, so iterate the session list in place
+        for session in self._session_list:
             # Check if cart should be marked as abandoned
-            if session.has_abandoned_cart(self.CART_ABANDONMENT_THRESHOLD):
-                event = self.simulate_cart_abandoned(session)
+            if session.has_abandoned_cart(self.cart_abandonment_threshold, now):
+                event = self.simulate_cart_abandoned(session, now)
                 if event:
                     abandoned_events.append(event)
         
@@ -698,22 +1103,22 @@ class EventSimulator:
         # Check for abandoned carts
         abandoned_events = self.check_abandoned_carts()
         if abandoned_events and random.random() < 0.3:  # 30% chance to return abandoned event
-            return abandoned_events[0]
+            return abandoned_events[-1]  # Most recently created, see generate_keyed_event
         
         # Create new session if needed (maintain 20-40% concurrent sessions)
         target_sessions = int(self.num_users * random.uniform(0.2, 0.4))
         if len(self.active_sessions) < target_sessions:
-            user_id = random.randint(1, self.num_users)
+            user_id = random.randint(self.user_id_start, self.user_id_end)
             session = self.create_session(user_id)
             return self._create_event('session_start', session, persona=session.persona.value)
         
         # Pick random active session
         if not self.active_sessions:
-            user_id = random.randint(1, self.num_users)
+            user_id = random.randint(self.user_id_start, self.user_id_end)
             session = self.create_session(user_id)
             return self._create_event('session_start', session, persona=session.persona.value)
         
-        session = random.choice(list(self.active_sessions.values()))
+        session = self._session_list[random.randrange(len(self._session_list))]
         
         # Check if session should end
         if self.should_end_session(session):
@@ -723,22 +1128,20 @@ class EventSimulator:
         next_action = self._determine_next_action(session)
         
         # Execute action
-        if next_action == 'page_view':
-            return self.simulate_page_view(session)
-        elif next_action == 'product_view':
-            return self.simulate_product_view(session)
-        elif next_action == 'add_to_cart':
-            return self.simulate_add_to_cart(session)
-        elif next_action == 'remove_from_cart':
-            return self.simulate_remove_from_cart(session)
-        elif next_action == 'checkout':
-            return self.simulate_checkout_initiated(session)
-        elif next_action == 'purchase':
-            return self.simulate_purchase(session)
-        elif next_action == 'search':
-            return self.simulate_search(session)
+        return self._dispatch.get(next_action, self.simulate_page_view)(session)
+    
+    def generate_keyed_event(self) -> Tuple[Dict[str, Any], bytes]:
+        """
+        Generate a single event together with its Kafka partition key.
         
-        return self.simulate_page_view(session)
+        generate_event always returns the last event created, so the key
+        recorded by _create_event belongs to the returned event.
+        
+        Returns:
+            Tuple of (event dictionary, session ID bytes)
+        """
+        event = self.generate_event()
+        return event, self._last_event_key
     
     def _determine_next_action(self, session: UserSession) -> str:
         """
@@ -753,134 +1156,95 @@ class EventSimulator:
         Returns:
             Action string
         """
-        state = session.state
-        persona = session.persona
-        
-        # NEW: RECOVERING state - user came back after intervention
-        if state == SessionState.RECOVERING:
-            # High probability of purchase after recovery
-            weights = {
-                'checkout': 40,
-                'purchase': 50,  # 50% chance to complete purchase
-                'product_view': 5,
-                'page_view': 5
-            }
-            return random.choices(list(weights.keys()), weights=list(weights.values()))[0]
+        actions, cum_weights = NEXT_ACTION_TABLE[session.state_code, session.persona_code]
+        return actions[bisect(cum_weights, random.random() * cum_weights[-1])]
+    
+    def generate_batch(self, n: int) -> List[Dict[str, Any]]:
+        """
+        Generate a batch of events for offline backfill / load testing.
         
-        # BROWSING state
-        if state == SessionState.BROWSING:
-            weights = {
-                'page_view': 40,
-                'product_view': 35,
-                'search': 25
-            }
+        All random fields are drawn as NumPy arrays in one pass and only
+        stitched into dicts at the end. Unlike generate_event, events are
+        sampled independently from the aggregate event mix, so per-session
+        journey constraints (e.g. no purchase without a cart) are not enforced.
         
-        # INTERESTED state (viewed multiple products)
-        elif state == SessionState.INTERESTED:
-            if persona == UserPersona.INTENT_BUYER:
-                # Intent buyers quickly add to cart
-                weights = {
-                    'product_view': 30,
-                    'add_to_cart': 50,
-                    'page_view': 15,
-                    'search': 5
-                }
-            elif persona == UserPersona.CART_ABANDONER:
-                # Cart abandoners add to cart but then browse
-                weights = {
-                    'product_view': 35,
-                    'add_to_cart': 40,
-                    'page_view': 20,
-                    'search': 5
-                }
-            else:  # WINDOW_SHOPPER
-                # Window shoppers keep browsing
-                weights = {
-                    'product_view': 45,
-                    'page_view': 30,
-                    'add_to_cart': 15,
-                    'search': 10
-                }
-        
-        # CART_ACTIVE state
-        elif state == SessionState.CART_ACTIVE:
-            if persona == UserPersona.INTENT_BUYER:
-                # Intent buyers go to checkout quickly
-                weights = {
-                    'checkout': 60,
-                    'add_to_cart': 20,
-                    'product_view': 10,
-                    'page_view': 5,
-                    'remove_from_cart': 5
-                }
-            elif persona == UserPersona.CART_ABANDONER:
-                # Cart abandoners browse more, rarely checkout
-                weights = {
-                    'page_view': 35,
-                    'product_view': 30,
-                    'add_to_cart': 15,
-                    'remove_from_cart': 15,
-                    'checkout': 5
-                }
-            else:  # WINDOW_SHOPPER
-                # Window shoppers hesitant to checkout
-                weights = {
-                    'page_view': 30,
-                    'product_view': 25,
-                    'add_to_cart': 20,
-                    'checkout': 15,
-                    'remove_from_cart': 10
-                }
-        
-        # CHECKOUT_INITIATED state
-        elif state == SessionState.CHECKOUT_INITIATED:
-            if persona == UserPersona.INTENT_BUYER:
-                # Intent buyers complete purchase
-                weights = {
-                    'purchase': 85,
-                    'page_view': 10,
-                    'remove_from_cart': 5
-                }
-            else:
-                # Others might abandon at checkout
-                weights = {
-                    'purchase': 40,
-                    'page_view': 30,
-                    'remove_from_cart': 20,
-                    'product_view': 10
-                }
-        
-        # Default fallback
-        else:
-            weights = {
-                'page_view': 50,
-                'product_view': 30,
-                'search': 20
+        Args:
+            n: Number of events to generate
+            
+        Returns:
+            List of event dictionaries
+        """
+        event_types = tuple(self.BACKFILL_EVENT_WEIGHTS)
+        weights = np.array(tuple(self.BACKFILL_EVENT_WEIGHTS.values()), dtype=np.float64)
+        device_weights = np.array(self.DEVICE_WEIGHTS, dtype=np.float64)
+        
+        # Draw every random field up front, then convert to Python ints once
+        type_idx = np.random.choice(len(event_types), size=n, p=weights / weights.sum()).tolist()
+        user_ids = np.random.randint(self.user_id_start, self.user_id_end + 1, size=n).tolist()
+        device_idx = np.random.choice(
+            len(self.DEVICE_TYPES), size=n, p=device_weights / device_weights.sum()
+        ).tolist()
+        browser_idx = np.random.randint(0, len(self.BROWSERS), size=n).tolist()
+        page_idx = np.random.randint(0, len(self.BROWSING_PAGES), size=n).tolist()
+        query_idx = np.random.randint(0, len(self.SEARCH_QUERIES), size=n).tolist()
+        payment_idx = np.random.randint(0, len(self.PAYMENT_METHODS), size=n).tolist()
+        time_on_page = np.random.randint(5, 121, size=n).tolist()
+        results_count = np.random.randint(5, 51, size=n).tolist()
+        quantities = np.random.choice(self.QUANTITIES, size=n, p=(0.7, 0.2, 0.1)).tolist()
+        product_idx = np.random.randint(0, max(len(self._products_tuple), 1), size=n).tolist()
+        
+        now_ns = time.time_ns()
+        products = self._products_tuple
+        next_event_id = self._event_ids.__next__
+        events = []
+        
+        for i, (t, user_id) in enumerate(zip(type_idx, user_ids)):
+            event_type = event_types[t]
+            event = {
+                "event_id": next_event_id(),
+                "timestamp_ns": now_ns,
+                "user_id": user_id,
+                "session_id": f"{self.session_prefix}backfill_{user_id}",
+                "event_type": event_type,
+                "device_type": self.DEVICE_TYPES[device_idx[i]],
+                "browser": self.BROWSERS[browser_idx[i]],
+                "session_state": self.BACKFILL_EVENT_STATES[event_type]
             }
+            
+            if event_type in ('product_view', 'add_to_cart', 'remove_from_cart') and products:
+                product = products[product_idx[i]]
+                event["product_id"] = product.get('id')
+                event["category"] = product.get('category')
+                event["price"] = product.get('price')
+            
+            if event_type == 'page_view':
+                event["page_url"] = self.BROWSING_PAGES[page_idx[i]]
+                event["time_on_page"] = time_on_page[i]
+            elif event_type == 'search':
+                event["search_query"] = self.SEARCH_QUERIES[query_idx[i]]
+                event["results_count"] = results_count[i]
+            elif event_type in ('add_to_cart', 'remove_from_cart'):
+                event["quantity"] = quantities[i]
+            elif event_type == 'checkout_initiated':
+                price = (products[product_idx[i]].get('price') or 0.0) if products else 0.0
+                event["cart_value"] = round(price * quantities[i], 2)
+                event["items_count"] = quantities[i]
+            elif event_type == 'purchase':
+                event["payment_method"] = self.PAYMENT_METHODS[payment_idx[i]]
+            
+            events.append(event)
         
-        # Select action based on weights
-        actions = list(weights.keys())
-        action_weights = list(weights.values())
+        # Keep running statistics consistent with generate_event
+        self.total_events += n
+        self.event_counts.update(event_types[t] for t in type_idx)
         
-        return random.choices(actions, weights=action_weights)[0]
+        return events
     
     def get_statistics(self) -> Dict[str, Any]:
         """Get simulation statistics"""
-        total_events = len(self.all_events)
-        
-        event_counts = {}
-        persona_counts = {p: 0 for p in UserPersona}
-        
-        for event in self.all_events:
-            event_type = event['event_type']
-            event_counts[event_type] = event_counts.get(event_type, 0) + 1
-            
-            # Count personas from session_start events
-            if event_type == 'session_start':
-                persona_str = event.get('persona')
-                for persona in UserPersona:
-                    if persona.value == persona_str:
-                        persona_counts[persona] += 1
+        total_events = self.total_events
+        event_counts = dict(self.event_counts)
+        persona_counts = {p: self.persona_counts[p] for p in UserPersona}
         
         # Calculate abandonment rate
         cart_abandoned = event_counts.get('cart_abandoned', 0)
@@ -5,16 +5,19 @@ This simulates real-time e-commerce traffic.
 """
 
 import logging
+import multiprocessing as mp
+import os
 import time
 import sys
 from pathlib import Path
+from typing import Any, Dict, List, Optional
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from confluent_kafka import Producer
 from config.config import config
 from data_ingestion.api_clients.fake_store_client import FakeStoreClient
-from data_ingestion.producers.event_simulator import EventSimulator
+from data_ingestion.producers.event_simulator import EventSimulator, serialize_event
 from streaming.kafka_utils.kafka_config import KafkaManager
 
 logger = logging.getLogger(__name__)
@@ -23,10 +26,19 @@ logger = logging.getLogger(__name__)
 class UserEventProducer:
     """Producer for streaming user behavior events to Kafka"""
     
+    # Minimum seconds between progress log lines
+    STATS_LOG_INTERVAL = 5.0
+    
+    # Seconds to keep retrying an event while the local producer queue is full
+    QUEUE_FULL_TIMEOUT = 30.0
+    
     def __init__(
         self, 
         num_users: int = 50,
-        events_per_second: int = 10
+        events_per_second: int = 10,
+        products: Optional[List[Dict[str, Any]]] = None,
+        user_id_start: int = 1,
+        worker_id: Optional[int] = None
     ):
         """
         Initialize user event producer.
@@ -34,6 +46,9 @@ class UserEventProducer:
         Args:
             num_users: Number of simulated concurrent users
             events_per_second: Target event generation rate
+            products: Product catalog (fetched from Fake Store API if not provided)
+            user_id_start: First user ID of the simulated range
+            worker_id: Worker ID when running as one of several processes
         """
         self.kafka_manager = KafkaManager()
         self.producer = self.kafka_manager.create_producer()
@@ -41,25 +56,90 @@ class UserEventProducer:
         self.events_per_second = events_per_second
         
         # Fetch real products from API
-        logger.info("Fetching products from Fake Store API...")
-        api_client = FakeStoreClient()
-        products = api_client.get_all_products()
-        api_client.close()
+        if products is None:
+            products = self.fetch_products()
         
         # Initialize event simulator
         self.simulator = EventSimulator(
             num_users=num_users,
-            products=products
+            products=products,
+            user_id_start=user_id_start,
+            worker_id=worker_id
         )
         
         self.total_events_sent = 0
+        self.delivery_failures = 0
         self.running = False
+        self._next_stats_log = 0.0
         
         logger.info(
             f"User event producer initialized: "
             f"{num_users} users, {events_per_second} events/sec"
         )
     
+    @staticmethod
+    def fetch_products() -> List[Dict[str, Any]]:
+        """Fetch the product catalog from Fake Store API"""
+        logger.info("Fetching products from Fake Store API...")
+        api_client = FakeStoreClient()
+        products = api_client.get_all_products()
+        api_client.close()
+        return products
+    
+    @classmethod
+    def run_workers(
+        cls,
+        num_workers: Optional[int] = None,
+        total_users: int = 1000,
+        eps_per_worker: int = 100,
+        duration_seconds: Optional[int] = None
+    ):
+        """
+        Stream events from several producer processes.
+        
+        Each worker owns a disjoint user ID range and its own Kafka producer.
+        Events are keyed by session_id, so broker-side partitioning is unchanged.
+        
+        Args:
+            num_workers: Number of processes (CPU count if not provided)
+            total_users: Total simulated users, split across workers
+            eps_per_worker: Target event rate of each worker
+            duration_seconds: How long to run (None = infinite)
+        """
+        num_workers = max(1, min(num_workers or os.cpu_count() or 1, total_users))
+        products = cls.fetch_products()
+        
+        # forkserver avoids forking a parent that may already run threads
+        ctx = mp.get_context('forkserver')
+        base, extra = divmod(total_users, num_workers)
+        processes = []
+        user_id_start = 1
+        
+        for worker_id in range(num_workers):
+            num_users = base + (1 if worker_id < extra else 0)
+            process = ctx.Process(
+                target=_run_worker,
+                args=(worker_id, user_id_start, num_users, eps_per_worker,
+                      products, duration_seconds),
+                name=f"user-event-producer-{worker_id}"
+            )
+            process.start()
+            processes.append(process)
+            user_id_start += num_users
+        
+        logger.info(
+            f"Started {num_workers} producer workers: "
+            f"{total_users} users, {num_workers * eps_per_worker} events/sec total"
+        )
+        
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            logger.info("Stopping producer workers...")
+            for process in processes:
+                process.join(timeout=10)
+    
     def send_event(self, event: dict) -> bool:
         """
         Send a single event to Kafka.
@@ -71,30 +151,70 @@ class UserEventProducer:
             True if successful
         """
         try:
-            success = self.kafka_manager.send_message(
-                self.producer,
-                self.topic,
-                event,
-                key=event['session_id']  # Use session_id for partitioning
-            )
+            # Produce pre-serialized orjson bytes directly, skipping the
+            # generic dict encoding in KafkaManager.send_message
+            value = serialize_event(event)
+            key = event['session_id'].encode('ascii')  # Use session_id for partitioning
+            try:
+                self.producer.produce(self.topic, value=value, key=key, on_delivery=self._on_delivery)
+            except BufferError:
+                if not self._produce_when_queue_frees(value, key):
+                    return False
+            self.producer.poll(0)
             
-            if success:
-                self.total_events_sent += 1
-                
-                # Log every 100 events
-                if self.total_events_sent % 100 == 0:
-                    stats = self.simulator.get_statistics()
-                    logger.info(
-                        f"Sent {self.total_events_sent} events. "
-                        f"Active sessions: {stats['active_sessions']}"
-                    )
+            self.total_events_sent += 1
+            
+            self._maybe_log_progress()
             
-            return success
+            return True
             
         except Exception as e:
             logger.error(f"Error sending event: {e}")
             return False
     
+    def _produce_when_queue_frees(self, value: bytes, key: bytes) -> bool:
+        """
+        Retry an event rejected because the local producer queue is full.
+        
+        Serves delivery reports to drain the queue and retries until the
+        event is accepted or QUEUE_FULL_TIMEOUT seconds have passed.
+        
+        Returns:
+            True if the event was enqueued, False if it was dropped
+        """
+        deadline = time.monotonic() + self.QUEUE_FULL_TIMEOUT
+        while True:
+            self.producer.poll(0.1)
+            try:
+                self.producer.produce(self.topic, value=value, key=key, on_delivery=self._on_delivery)
+                return True
+            except BufferError:
+                if time.monotonic() >= deadline:
+                    self.delivery_failures += 1
+                    logger.error(
+                        f"Producer queue still full after {self.QUEUE_FULL_TIMEOUT:.0f}s, dropping event"
+                    )
+                    return False
+    
+    def _on_delivery(self, err, msg):
+        """Delivery report callback for streamed events"""
+        if err is not None:
+            self.delivery_failures += 1
+            logger.error(f"Message delivery failed: {err}")
+    
+    def _maybe_log_progress(self):
+        """Log streaming progress, at most once per STATS_LOG_INTERVAL seconds"""
+        now = time.monotonic()
+        if now < self._next_stats_log or not logger.isEnabledFor(logging.INFO):
+            return
+        self._next_stats_log = now + self.STATS_LOG_INTERVAL
+        
+        stats = self.simulator.get_statistics()
+        logger.info(
+            f"Sent {self.total_events_sent} events. "
+            f"Active sessions: {stats['active_sessions']}"
+        )
+    
     def start_streaming(self, duration_seconds: int = None):
         """
         Start streaming events to Kafka.
@@ -103,42 +223,100 @@ class UserEventProducer:
             duration_seconds: How long to run (None = infinite)
         """
         self.running = True
-        start_time = time.time()
+        start_time = time.monotonic()
+        next_tick = start_time
         
         logger.info(
             f"🚀 Starting event stream: {self.events_per_second} events/sec"
         )
         
+        # Bind the hot-path callables once
+        produce = self.producer.produce
+        poll = self.producer.poll
+        generate_keyed_event = self.simulator.generate_keyed_event
+        serialize = serialize_event
+        topic = self.topic
+        on_delivery = self._on_delivery
+        
         try:
-            event_count = 0
             while self.running:
-                loop_start = time.time()
-                
-                # Generate and send events for this second
+                # Enqueue this second's events; librdkafka batches them
+                # according to linger.ms / batch.num.messages
                 for _ in range(self.events_per_second):
-                    event = self.simulator.generate_event()
-                    self.send_event(event)
-                    event_count += 1
+                    event, key = generate_keyed_event()
+                    value = serialize(event)
+                    try:
+                        produce(topic, value=value, key=key, on_delivery=on_delivery)
+                    except BufferError:
+                        if not self._produce_when_queue_frees(value, key):
+                            continue
+                    self.total_events_sent += 1
                 
-                # Flush producer periodically
-                if event_count % 50 == 0:
-                    self.producer.flush()
+                # Serve delivery callbacks once per batch
+                poll(0)
+                
+                self._maybe_log_progress()
                 
                 # Check if duration expired
-                if duration_seconds and (time.time() - start_time) >= duration_seconds:
+                now = time.monotonic()
+                if duration_seconds and (now - start_time) >= duration_seconds:
                     logger.info(f"Duration of {duration_seconds}s reached. Stopping...")
                     break
                 
-                # Sleep to maintain target rate
-                elapsed = time.time() - loop_start
-                sleep_time = max(0, 1.0 - elapsed)
-                time.sleep(sleep_time)
+                # Sleep until the next one-second deadline to maintain target rate
+                next_tick += 1.0
+                slack = next_tick - now
+                if slack > 0:
+                    time.sleep(slack)
+                else:
+                    # Fell behind - reset the schedule instead of bursting to catch up
+                    next_tick = now
                 
         except KeyboardInterrupt:
             logger.info("\nStopping event stream (Ctrl+C pressed)...")
         finally:
             self.stop()
     
+    def backfill(self, num_events: int, batch_size: int = 10000):
+        """
+        Send a burst of historical-style events as fast as Kafka accepts them.
+        
+        Uses EventSimulator.generate_batch, which samples events from the
+        aggregate event mix instead of walking session journeys, so it is
+        meant for load testing and seeding topics rather than live traffic.
+        
+        Args:
+            num_events: Total number of events to send
+            batch_size: Events generated per generate_batch call
+        """
+        logger.info(f"📦 Backfilling {num_events} events")
+        
+        produce = self.producer.produce
+        poll = self.producer.poll
+        serialize = serialize_event
+        topic = self.topic
+        on_delivery = self._on_delivery
+        
+        remaining = num_events
+        try:
+            while remaining > 0:
+                for event in self.simulator.generate_batch(min(batch_size, remaining)):
+                    value = serialize(event)
+                    key = event['session_id'].encode('ascii')
+                    try:
+                        produce(topic, value=value, key=key, on_delivery=on_delivery)
+                    except BufferError:
+                        if not self._produce_when_queue_frees(value, key):
+                            continue
+                    self.total_events_sent += 1
+                remaining -= batch_size
+                poll(0)
+                self._maybe_log_progress()
+        except KeyboardInterrupt:
+            logger.info("\nStopping backfill (Ctrl+C pressed)...")
+        finally:
+            self.stop()
+    
     def stop(self):
         """Stop the producer and show statistics"""
         self.running = False
@@ -154,6 +332,7 @@ class UserEventProducer:
         print("📊 STREAMING STATISTICS")
         print("="*60)
         print(f"Total events sent: {self.total_events_sent}")
+        print(f"Delivery failures: {self.delivery_failures}")
         print(f"Active sessions: {stats['active_sessions']}")
         print(f"\nEvent breakdown:")
         for event_type, count in stats['event_breakdown'].items():
@@ -164,6 +343,29 @@ class UserEventProducer:
         logger.info("User event producer stopped")
 
 
+def _run_worker(
+    worker_id: int,
+    user_id_start: int,
+    num_users: int,
+    events_per_second: int,
+    products: List[Dict[str, Any]],
+    duration_seconds: Optional[int]
+):
+    """Entry point for a UserEventProducer.run_workers child process"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(processName)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    producer = UserEventProducer(
+        num_users=num_users,
+        events_per_second=events_per_second,
+        products=products,
+        user_id_start=user_id_start,
+        worker_id=worker_id
+    )
+    producer.start_streaming(duration_seconds=duration_seconds)
+
+
 if __name__ == "__main__":
     # Configure logging
     logging.basicConfig(
@@ -171,6 +373,12 @@ if __name__ == "__main__":
         format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
     )
     
+    # --backfill N: send N batch-generated events as fast as possible, then exit
+    if '--backfill' in sys.argv[1:]:
+        num_events = int(sys.argv[sys.argv.index('--backfill') + 1])
+        UserEventProducer(num_users=1000).backfill(num_events)
+        sys.exit(0)
+    
     print("\n" + "="*60)
     print("🎬 USER EVENT STREAMING - REAL-TIME SIMULATION")
     print("="*60)
@@ -1,13 +1,75 @@
 """
 Event schemas for Kafka messages.
 Defines the structure of all events in the system.
+
+Schemas are msgspec Structs so inbound Kafka payloads are decoded and
+validated in one pass by the module-level decoders below. Timestamps are
+integer epoch nanoseconds (UTC). Event IDs are 64-bit integers, see
+event_id_counter().
 """
 
-from datetime import datetime
-from typing import Optional, Dict, Any
-from pydantic import BaseModel, Field
+import time
+from typing import Optional, Dict, Any, ClassVar, Iterator, List, Union
 from enum import Enum
 
+import msgspec
+import orjson
+
+
+# Event ID layout: milliseconds since EVENT_ID_EPOCH_MS | 10-bit shard | 12-bit per-ms sequence
+EVENT_ID_EPOCH_MS = 1704067200000  # 2024-01-01T00:00:00Z, keeps IDs within BIGINT until 2093
+EVENT_ID_SHARD_BITS = 10
+EVENT_ID_SEQUENCE_BITS = 12
+EVENT_ID_MAX_SHARD = (1 << EVENT_ID_SHARD_BITS) - 1
+EVENT_ID_MAX_SEQUENCE = (1 << EVENT_ID_SEQUENCE_BITS) - 1
+
+# Shards reserved per producer; concurrently running producers must not share one
+PRODUCT_EVENT_SHARD = 1
+WEATHER_EVENT_SHARD = 2
+FINANCE_EVENT_SHARD = 3
+USER_EVENT_SHARD = 4
+SIMULATOR_WORKER_SHARD_BASE = 16  # Simulator worker N uses base + N
+
+
+def event_id_counter(shard_id: int) -> Iterator[int]:
+    """
+    Create a sequence of unique, time-ordered integer event IDs.
+    
+    Each ID packs the current millisecond, the producer's shard and a
+    sequence number that restarts every millisecond. Two producers on
+    different shards never collide, and a restarted producer resumes at
+    the current time instead of reusing IDs it issued before. If more than
+    4096 IDs are requested within one millisecond the counter borrows the
+    next millisecond rather than wrapping.
+    
+    Args:
+        shard_id: Producer/worker shard (0-1023), see the *_SHARD constants
+        
+    Returns:
+        Iterator yielding event IDs
+    """
+    if not 0 <= shard_id <= EVENT_ID_MAX_SHARD:
+        raise ValueError(f"shard_id must be between 0 and {EVENT_ID_MAX_SHARD}, got {shard_id}")
+    return _event_ids(shard_id << EVENT_ID_SEQUENCE_BITS)
+
+
+def _event_ids(shard_bits: int) -> Iterator[int]:
+    """Yield event IDs for an already shifted shard, see event_id_counter()"""
+    time_shift = EVENT_ID_SHARD_BITS + EVENT_ID_SEQUENCE_BITS
+    last_ms = -1
+    sequence = 0
+    while True:
+        now_ms = time.time_ns() // 1_000_000 - EVENT_ID_EPOCH_MS
+        if now_ms > last_ms:
+            last_ms = now_ms
+            sequence = 0
+        elif sequence < EVENT_ID_MAX_SEQUENCE:
+            sequence += 1
+        else:
+            last_ms += 1
+            sequence = 0
+        yield (last_ms << time_shift) | shard_bits | sequence
+
 
 class EventType(str, Enum):
     """Types of user events"""
@@ -15,17 +77,20 @@ class EventType(str, Enum):
     PRODUCT_VIEW = "product_view"
     ADD_TO_CART = "add_to_cart"
     REMOVE_FROM_CART = "remove_from_cart"
+    CHECKOUT_INITIATED = "checkout_initiated"
     PURCHASE = "purchase"
+    CART_ABANDONED = "cart_abandoned"
+    SESSION_RECOVERED = "session_recovered"
     SEARCH = "search"
     FILTER = "filter"
     SESSION_START = "session_start"
     SESSION_END = "session_end"
 
 
-class ProductEvent(BaseModel):
+class ProductEvent(msgspec.Struct, kw_only=True, frozen=True, gc=False):
     """Schema for product-related events from Fake Store API"""
-    event_id: str = Field(..., description="Unique event identifier")
-    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+    event_id: int  # Unique event identifier, see event_id_counter()
+    timestamp_ns: int  # Event time in epoch nanoseconds, set by the producer
     product_id: int
     title: str
     price: float
@@ -34,92 +99,183 @@ class ProductEvent(BaseModel):
     image: Optional[str] = None
     rating_rate: Optional[float] = None
     rating_count: Optional[int] = None
-    stock_quantity: int = Field(default=100, description="Simulated stock level")
+    stock_quantity: int = 100  # Simulated stock level
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "event_id": "prod_123_456",
-                "timestamp": "2025-10-15T09:30:00.000Z",
-                "product_id": 1,
-                "title": "Fjallraven Backpack",
-                "price": 109.95,
-                "category": "men's clothing",
-                "rating_rate": 3.9,
-                "rating_count": 120,
-                "stock_quantity": 45
-            }
-        }
-
-
-class UserEvent(BaseModel):
-    """Schema for user behavior events"""
-    event_id: str = Field(..., description="Unique event identifier")
-    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "event_id": 236782721433604096,
+        "timestamp_ns": 1760520600000000000,
+        "product_id": 1,
+        "title": "Fjallraven Backpack",
+        "price": 109.95,
+        "category": "men's clothing",
+        "rating_rate": 3.9,
+        "rating_count": 120,
+        "stock_quantity": 45
+    }
+
+
+class UserEventBase(msgspec.Struct, kw_only=True, frozen=True, gc=False, tag_field="event_type"):
+    """
+    Fields shared by all user behavior events.
+    
+    Each subclass is tagged with its EventType value, so decoding a UserEvent
+    dispatches on "event_type" and only validates that event's own fields.
+    """
+    event_id: int  # Unique event identifier, see event_id_counter()
+    timestamp_ns: int  # Event time in epoch nanoseconds, set by the producer
     user_id: int
     session_id: str
-    event_type: EventType
-    product_id: Optional[int] = None
-    category: Optional[str] = None
-    price: Optional[float] = None
-    quantity: Optional[int] = 1
-    search_query: Optional[str] = None
     page_url: Optional[str] = None
     referrer: Optional[str] = None
-    device_type: str = Field(default="desktop", description="desktop, mobile, tablet")
+    device_type: str = "desktop"  # desktop, mobile, tablet
     browser: Optional[str] = None
-    time_on_page: Optional[int] = Field(None, description="Time spent in seconds")
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "event_id": "evt_789_012",
-                "timestamp": "2025-10-15T09:35:00.000Z",
-                "user_id": 42,
-                "session_id": "sess_abc123",
-                "event_type": "add_to_cart",
-                "product_id": 5,
-                "category": "electronics",
-                "price": 299.99,
-                "quantity": 1,
-                "device_type": "mobile"
-            }
-        }
-
-
-class WeatherEvent(BaseModel):
+    @property
+    def event_type(self) -> EventType:
+        """Event type this struct was tagged with"""
+        return EventType(self.__struct_config__.tag)
+
+
+class PageViewEvent(UserEventBase, tag=EventType.PAGE_VIEW.value):
+    """Schema for page view events"""
+    time_on_page: Optional[int] = None  # Time spent in seconds
+
+
+class ProductViewEvent(UserEventBase, tag=EventType.PRODUCT_VIEW.value):
+    """Schema for product view events"""
+    product_id: int
+    category: Optional[str] = None
+    price: Optional[float] = None
+    time_on_page: Optional[int] = None  # Time spent in seconds
+
+
+class AddToCartEvent(UserEventBase, tag=EventType.ADD_TO_CART.value):
+    """Schema for add-to-cart events"""
+    product_id: int
+    category: Optional[str] = None
+    price: Optional[float] = None
+    quantity: int = 1
+    cart_value: Optional[float] = None  # Cart total after this change
+    
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "event_id": 236783979724816384,
+        "timestamp_ns": 1760520900000000000,
+        "user_id": 42,
+        "session_id": "sess_abc123",
+        "event_type": "add_to_cart",
+        "product_id": 5,
+        "category": "electronics",
+        "price": 299.99,
+        "quantity": 1,
+        "device_type": "mobile"
+    }
+
+
+class RemoveFromCartEvent(UserEventBase, tag=EventType.REMOVE_FROM_CART.value):
+    """Schema for remove-from-cart events"""
+    product_id: int
+    category: Optional[str] = None
+    price: Optional[float] = None
+    quantity: int = 1
+    cart_value: Optional[float] = None  # Cart total after this change
+
+
+class CheckoutInitiatedEvent(UserEventBase, tag=EventType.CHECKOUT_INITIATED.value):
+    """Schema for checkout initiated events"""
+    cart_value: float
+    items_count: int
+
+
+class PurchaseEvent(UserEventBase, tag=EventType.PURCHASE.value):
+    """Schema for purchase events"""
+    product_id: Optional[int] = None
+    price: Optional[float] = None
+    quantity: int = 1
+    cart_value: Optional[float] = None
+    payment_method: Optional[str] = None
+    recovered_from_abandonment: bool = False
+
+
+class CartAbandonedEvent(UserEventBase, tag=EventType.CART_ABANDONED.value):
+    """Schema for cart abandonment events"""
+    cart_value: float
+    items_count: int
+    abandonment_reason: Optional[str] = None
+    time_in_cart_seconds: int = 0
+
+
+class SessionRecoveredEvent(UserEventBase, tag=EventType.SESSION_RECOVERED.value):
+    """Schema for events where an abandoned cart is recovered after an intervention"""
+    recovery_time_seconds: int
+    cart_value: float
+
+
+class SearchEvent(UserEventBase, tag=EventType.SEARCH.value):
+    """Schema for search events"""
+    search_query: str
+
+
+class FilterEvent(UserEventBase, tag=EventType.FILTER.value):
+    """Schema for category filter events"""
+    category: Optional[str] = None
+
+
+class SessionStartEvent(UserEventBase, tag=EventType.SESSION_START.value):
+    """Schema for session start events"""
+    persona: Optional[str] = None
+
+
+class SessionEndEvent(UserEventBase, tag=EventType.SESSION_END.value):
+    """Schema for session end events"""
+
+
+# Schema for user behavior events, discriminated on "event_type"
+UserEvent = Union[
+    PageViewEvent,
+    ProductViewEvent,
+    AddToCartEvent,
+    RemoveFromCartEvent,
+    CheckoutInitiatedEvent,
+    PurchaseEvent,
+    CartAbandonedEvent,
+    SessionRecoveredEvent,
+    SearchEvent,
+    FilterEvent,
+    SessionStartEvent,
+    SessionEndEvent
+]
+
+
+class WeatherEvent(msgspec.Struct, kw_only=True, frozen=True, gc=False):
     """Schema for weather data events"""
-    event_id: str = Field(..., description="Unique event identifier")
-    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
-    location: str = Field(default="New York", description="City name")
-    temperature: float = Field(..., description="Temperature in Celsius")
+    event_id: int  # Unique event identifier, see event_id_counter()
+    timestamp_ns: int  # Event time in epoch nanoseconds, set by the producer
+    location: str = "New York"  # City name
+    temperature: float  # Temperature in Celsius
     feels_like: float
     humidity: int
-    weather_condition: str = Field(..., description="Clear, Rain, Snow, etc.")
+    weather_condition: str  # Clear, Rain, Snow, etc.
     weather_description: str
     wind_speed: float
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "event_id": "weather_345",
-                "timestamp": "2025-10-15T09:00:00.000Z",
-                "location": "New York",
-                "temperature": 22.5,
-                "feels_like": 21.0,
-                "humidity": 65,
-                "weather_condition": "Clear",
-                "weather_description": "clear sky",
-                "wind_speed": 3.5
-            }
-        }
-
-
-class FinanceEvent(BaseModel):
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "event_id": 236775171686408192,
+        "timestamp_ns": 1760518800000000000,
+        "location": "New York",
+        "temperature": 22.5,
+        "feels_like": 21.0,
+        "humidity": 65,
+        "weather_condition": "Clear",
+        "weather_description": "clear sky",
+        "wind_speed": 3.5
+    }
+
+
+class FinanceEvent(msgspec.Struct, kw_only=True, frozen=True, gc=False):
     """Schema for financial/economic indicator events"""
-    event_id: str = Field(..., description="Unique event identifier")
-    timestamp: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
-    symbol: str = Field(..., description="Stock ticker or index symbol")
+    event_id: int  # Unique event identifier, see event_id_counter()
+    timestamp_ns: int  # Event time in epoch nanoseconds, set by the producer
+    symbol: str  # Stock ticker or index symbol
     current_price: float
     open_price: float
     high_price: float
@@ -128,53 +284,47 @@ class FinanceEvent(BaseModel):
     market_cap: Optional[float] = None
     change_percent: Optional[float] = None
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "event_id": "fin_567",
-                "timestamp": "2025-10-15T09:00:00.000Z",
-                "symbol": "SPY",
-                "current_price": 445.50,
-                "open_price": 443.20,
-                "high_price": 446.00,
-                "low_price": 442.80,
-                "volume": 50000000,
-                "change_percent": 0.52
-            }
-        }
-
-
-class CartState(BaseModel):
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "event_id": 236775171686412288,
+        "timestamp_ns": 1760518800000000000,
+        "symbol": "SPY",
+        "current_price": 445.50,
+        "open_price": 443.20,
+        "high_price": 446.00,
+        "low_price": 442.80,
+        "volume": 50000000,
+        "change_percent": 0.52
+    }
+
+
+class CartState(msgspec.Struct, kw_only=True):
     """Schema for shopping cart state"""
     user_id: int
     session_id: str
-    items: list[Dict[str, Any]] = Field(default_factory=list)
+    items: List[Dict[str, Any]] = msgspec.field(default_factory=list)
     total_value: float = 0.0
     item_count: int = 0
-    last_updated: str = Field(default_factory=lambda: datetime.utcnow().isoformat())
+    last_updated_ns: int = msgspec.field(default_factory=time.time_ns)
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "user_id": 42,
-                "session_id": "sess_abc123",
-                "items": [
-                    {"product_id": 5, "quantity": 1, "price": 299.99},
-                    {"product_id": 12, "quantity": 2, "price": 49.99}
-                ],
-                "total_value": 399.97,
-                "item_count": 3,
-                "last_updated": "2025-10-15T09:40:00.000Z"
-            }
-        }
-
-
-class SessionMetrics(BaseModel):
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "user_id": 42,
+        "session_id": "sess_abc123",
+        "items": [
+            {"product_id": 5, "quantity": 1, "price": 299.99},
+            {"product_id": 12, "quantity": 2, "price": 49.99}
+        ],
+        "total_value": 399.97,
+        "item_count": 3,
+        "last_updated_ns": 1760521200000000000
+    }
+
+
+class SessionMetrics(msgspec.Struct, kw_only=True, gc=False):
     """Schema for session-level metrics"""
     session_id: str
     user_id: int
-    start_time: str
-    last_activity: str
+    start_time_ns: int
+    last_activity_ns: int
     page_views: int = 0
     products_viewed: int = 0
     cart_additions: int = 0
@@ -184,20 +334,73 @@ class SessionMetrics(BaseModel):
     is_active: bool = True
     converted: bool = False
     
-    class Config:
-        schema_extra = {
-            "example": {
-                "session_id": "sess_abc123",
-                "user_id": 42,
-                "start_time": "2025-10-15T09:30:00.000Z",
-                "last_activity": "2025-10-15T09:45:00.000Z",
-                "page_views": 12,
-                "products_viewed": 8,
-                "cart_additions": 3,
-                "cart_removals": 1,
-                "searches": 2,
-                "total_time_seconds": 900,
-                "is_active": True,
-                "converted": False
-            }
-        }
+    EXAMPLE: ClassVar[Dict[str, Any]] = {
+        "session_id": "sess_abc123",
+        "user_id": 42,
+        "start_time_ns": 1760520600000000000,
+        "last_activity_ns": 1760521500000000000,
+        "page_views": 12,
+        "products_viewed": 8,
+        "cart_additions": 3,
+        "cart_removals": 1,
+        "searches": 2,
+        "total_time_seconds": 900,
+        "is_active": True,
+        "converted": False
+    }
+
+
+# Decoders are built once; decode() validates and constructs in a single pass
+PRODUCT_DECODER = msgspec.json.Decoder(ProductEvent)
+USER_DECODER = msgspec.json.Decoder(UserEvent)
+WEATHER_DECODER = msgspec.json.Decoder(WeatherEvent)
+FINANCE_DECODER = msgspec.json.Decoder(FinanceEvent)
+CART_DECODER = msgspec.json.Decoder(CartState)
+SESSION_DECODER = msgspec.json.Decoder(SessionMetrics)
+
+# Shared encoder for any of the schemas above
+USER_ENCODER = msgspec.json.Encoder()
+
+# Validate raw Kafka bytes straight into a UserEvent (no json.loads round-trip)
+validate_user_event_json = USER_DECODER.decode
+
+# Naive datetimes in event dicts are treated as UTC
+EVENT_JSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z
+
+
+def event_dumps(event: Any) -> bytes:
+    """
+    Serialize an event to JSON bytes for Kafka.
+    
+    Args:
+        event: A schema Struct or a plain event dictionary
+        
+    Returns:
+        UTF-8 encoded JSON
+    """
+    if isinstance(event, msgspec.Struct):
+        return USER_ENCODER.encode(event)
+    return orjson.dumps(event, option=EVENT_JSON_OPTIONS)
+
+
+def event_loads(payload: bytes) -> Dict[str, Any]:
+    """Deserialize a Kafka message value into an event dictionary"""
+    return orjson.loads(payload)
+
+
+def json_schema(schema: type) -> Dict[str, Any]:
+    """
+    Build the JSON Schema for an event schema, including its example payload.
+    
+    Args:
+        schema: One of the Struct classes (or the UserEvent union) defined in this module
+        
+    Returns:
+        JSON Schema dictionary
+    """
+    definition = msgspec.json.schema(schema)
+    example = getattr(schema, 'EXAMPLE', None)
+    struct_definition = definition.get('$defs', {}).get(getattr(schema, '__name__', None))
+    if example is not None and struct_definition is not None:
+        struct_definition['examples'] = [example]
+    return definition
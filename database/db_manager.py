@@ -6,12 +6,19 @@ Handles connections, schema setup, and CRUD operations.
 # Add these lines BEFORE other imports
 import sys
 from pathlib import Path
-project_root = Path(__file__).parent.parent
-sys.path.insert(0, str(project_root))
+project_root = str(Path(__file__).parent.parent)
+if project_root not in sys.path:  # Already importable when run from the project root
+    sys.path.insert(0, project_root)
 
+import hashlib
 import logging
-import re
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from typing import List, Dict, Any, Mapping, Optional, Sequence
+from urllib.parse import quote
+import orjson
+import pyarrow as pa
+import sqlparse
+from psycopg2.extras import execute_values, register_default_json, register_default_jsonb
 from sqlalchemy import create_engine, text
 from sqlalchemy.pool import QueuePool
 from sqlalchemy.engine import Engine
@@ -19,17 +26,44 @@ from config.config import config
 
 logger = logging.getLogger(__name__)
 
+# Parse json/jsonb columns with orjson on every psycopg2 connection
+register_default_json(globally=True, loads=orjson.loads)
+register_default_jsonb(globally=True, loads=orjson.loads)
+
+
+def postgres_uri() -> str:
+    """Connection URI for the configured database (for ADBC)"""
+    return (
+        f"postgresql://{quote(config.POSTGRES_USER)}:{quote(config.POSTGRES_PASSWORD)}"
+        f"@{config.POSTGRES_HOST}:{config.POSTGRES_PORT}/{config.POSTGRES_DB}"
+    )
+
+
+@lru_cache(maxsize=8)
+def _load_schema_text(path: str, mtime_ns: int) -> str:
+    """Read a schema file; cached per (path, mtime) so edits are picked up"""
+    with open(path, 'r', encoding='utf-8') as f:
+        return f.read()
+
 
 class DatabaseManager:
     """Manager for PostgreSQL database operations using SQLAlchemy"""
     
-    def __init__(self):
-        """Initialize database manager with connection pool"""
+    def __init__(self, read_url: Optional[str] = None):
+        """
+        Initialize database manager with connection pool.
+        
+        Args:
+            read_url: Connection URL of a read replica for analytics queries
+                      (config.POSTGRES_READ_URL if not provided)
+        """
         self.engine: Optional[Engine] = None
-        self._initialize_engine()
+        self.read_engine: Optional[Engine] = None
+        self.read_url = read_url or config.POSTGRES_READ_URL
+        self._initialize_engine(self.read_url)
     
-    def _initialize_engine(self):
-        """Create SQLAlchemy engine with connection pool"""
+    def _initialize_engine(self, read_url: Optional[str] = None):
+        """Create SQLAlchemy engines with connection pools"""
         try:
             # Build connection string with password (psycopg2 requires it in connection string)
             connection_string = (
@@ -40,12 +74,39 @@ class DatabaseManager:
             self.engine = create_engine(
                 connection_string,
                 poolclass=QueuePool,
-                pool_size=5,
-                max_overflow=10,
-                pool_pre_ping=True,  # Verify connections before using
+                pool_size=config.DB_POOL_SIZE,
+                max_overflow=config.DB_MAX_OVERFLOW,
+                pool_timeout=config.DB_POOL_TIMEOUT,
+                # Recycle connections instead of pinging them; a pre-ping
+                # through PgBouncer in transaction mode costs an extra
+                # transaction per checkout
+                pool_recycle=config.DB_POOL_RECYCLE,
+                pool_pre_ping=not config.DB_BEHIND_PGBOUNCER,
+                # Rewrite executemany() INSERTs as multi-row VALUES and batch
+                # UPDATE/DELETE instead of one round-trip per row
+                executemany_mode='values_plus_batch',
+                insertmanyvalues_page_size=1000,
+                executemany_batch_page_size=500,
+                isolation_level='READ COMMITTED',
                 echo=False  # Set to True for SQL debug logging
             )
             
+            # Separate pool for analytics reads so long SELECTs can't starve
+            # ingestion writes; shares the write pool when there is no replica
+            if read_url:
+                self.read_engine = create_engine(
+                    read_url,
+                    poolclass=QueuePool,
+                    pool_size=config.DB_READ_POOL_SIZE,
+                    max_overflow=config.DB_MAX_OVERFLOW,
+                    pool_timeout=config.DB_POOL_TIMEOUT,
+                    pool_recycle=config.DB_POOL_RECYCLE,
+                    pool_pre_ping=not config.DB_BEHIND_PGBOUNCER,
+                    echo=False
+                )
+            else:
+                self.read_engine = self.engine
+            
             # Test connection
             with self.engine.connect() as conn:
                 conn.execute(text("SELECT 1"))
@@ -67,69 +128,64 @@ class DatabaseManager:
         """
         Split SQL content into individual statements, handling complex cases.
         
+        Comments are stripped first; sqlparse's tokenizer handles quoted
+        strings and dollar-quoted function bodies.
+        
         Args:
             sql_content: Full SQL file content
             
         Returns:
             List of SQL statements
         """
-        # Remove SQL comments (-- style and /* */ style)
-        sql_content = re.sub(r'--[^\n]*', '', sql_content)
-        sql_content = re.sub(r'/\*.*?\*/', '', sql_content, flags=re.DOTALL)
-        
-        # Split by semicolon but be smart about it
-        statements = []
-        current_statement = []
-        in_dollar_quote = False
-        dollar_tag = None
-        
-        lines = sql_content.split('\n')
-        
-        for line in lines:
-            stripped = line.strip()
-            
-            # Check for dollar-quoted strings ($$)
-            if '$$' in stripped:
-                if not in_dollar_quote:
-                    # Starting dollar quote
-                    in_dollar_quote = True
-                    # Extract the tag if any (e.g., $tag$ or just $$)
-                    match = re.search(r'\$(\w*)\$', stripped)
-                    if match:
-                        dollar_tag = match.group(0)
-                else:
-                    # Check if this closes the dollar quote
-                    if dollar_tag and dollar_tag in stripped:
-                        in_dollar_quote = False
-                        dollar_tag = None
-                    elif '$$' in stripped and dollar_tag == '$$':
-                        in_dollar_quote = False
-                        dollar_tag = None
-            
-            current_statement.append(line)
-            
-            # If we hit a semicolon and not in dollar quote, it's end of statement
-            if ';' in stripped and not in_dollar_quote:
-                statement = '\n'.join(current_statement).strip()
-                if statement and not statement.startswith('--'):
-                    statements.append(statement)
-                current_statement = []
+        sql_content = sqlparse.format(sql_content, strip_comments=True)
+        return [s.strip() for s in sqlparse.split(sql_content) if s.strip()]
+    
+    def _execute_statements(self, statements: List[str]):
+        """
+        Execute statements one at a time in a single transaction.
         
-        # Add any remaining statement
-        if current_statement:
-            statement = '\n'.join(current_statement).strip()
-            if statement and not statement.startswith('--'):
-                statements.append(statement)
+        Slower than sending the whole file, but pinpoints the failing statement.
         
-        # Filter out empty statements
-        return [s for s in statements if s and s.strip()]
+        Args:
+            statements: SQL statements to execute
+        """
+        with self.engine.begin() as conn:
+            for i, statement in enumerate(statements, 1):
+                try:
+                    conn.execute(text(statement))
+                    logger.debug(f"Executed statement {i}/{len(statements)}")
+                except Exception as e:
+                    logger.error(f"Error in statement {i}: {e}")
+                    logger.error(f"Statement: {statement[:200]}...")
+                    raise
+    
+    def _schema_applied(self, file_hash: str) -> bool:
+        """Check the schema_migrations table for an already-applied file hash"""
+        with self.engine.begin() as conn:
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS schema_migrations (
+                    file_hash TEXT PRIMARY KEY,
+                    applied_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+                )
+            """))
+            result = conn.execute(
+                text("SELECT 1 FROM schema_migrations WHERE file_hash = :h"),
+                {'h': file_hash}
+            )
+            return result.first() is not None
     
-    def execute_schema(self, schema_file: str) -> bool:
+    def execute_schema(self, schema_file: str, force: bool = False) -> bool:
         """
         Execute SQL schema file.
         
+        The whole file is sent in one round-trip; if that fails it is re-run
+        statement by statement to report which statement is at fault.
+        Files whose content hash is already recorded in schema_migrations
+        are skipped.
+        
         Args:
             schema_file: Path to SQL file
+            force: Execute even if this exact file was already applied
             
         Returns:
             True if successful
@@ -140,8 +196,37 @@ class DatabaseManager:
             if not schema_path.exists():
                 raise FileNotFoundError(f"Schema file not found: {schema_file}")
             
-            with open(schema_path, 'r', encoding='utf-8') as f:
-                schema_sql = f.read()
+            schema_sql = _load_schema_text(str(schema_path), schema_path.stat().st_mtime_ns)
+            
+            if not schema_sql.strip():
+                logger.warning(f"No SQL statements found in {schema_file}")
+                return True  # Not an error, just empty
+            
+            file_hash = hashlib.blake2b(schema_sql.encode('utf-8'), digest_size=16).hexdigest()
+            if not force and self._schema_applied(file_hash):
+                logger.info(f"Schema unchanged since last run, skipping: {schema_file}")
+                return True
+            
+            record_sql = (
+                "INSERT INTO schema_migrations (file_hash) VALUES (%s) "
+                "ON CONFLICT (file_hash) DO UPDATE SET applied_at = NOW()"
+            )
+            
+            # Execute the whole file at once (no parameters, so psycopg2
+            # passes it through as a single multi-statement query)
+            conn = self.engine.raw_connection()
+            try:
+                with conn.cursor() as cursor:
+                    cursor.execute(schema_sql)
+                    cursor.execute(record_sql, (file_hash,))
+                conn.commit()
+                logger.info(f"Schema executed successfully: {schema_file}")
+                return True
+            except Exception as e:
+                conn.rollback()
+                logger.warning(f"Schema failed as a single batch ({e}), retrying per statement")
+            finally:
+                conn.close()
             
             # Split into individual statements
             statements = self._split_sql_statements(schema_sql)
@@ -150,16 +235,9 @@ class DatabaseManager:
                 logger.warning(f"No SQL statements found in {schema_file}")
                 return True  # Not an error, just empty
             
-            # Execute each statement
+            self._execute_statements(statements)
             with self.engine.begin() as conn:
-                for i, statement in enumerate(statements, 1):
-                    try:
-                        conn.execute(text(statement))
-                        logger.debug(f"Executed statement {i}/{len(statements)}")
-                    except Exception as e:
-                        logger.error(f"Error in statement {i}: {e}")
-                        logger.error(f"Statement: {statement[:200]}...")
-                        raise
+                conn.exec_driver_sql(record_sql, (file_hash,))
             
             logger.info(f"Schema executed successfully: {schema_file} ({len(statements)} statements)")
             return True
@@ -172,8 +250,9 @@ class DatabaseManager:
         self, 
         query: str, 
         params: dict = None,
-        fetch: bool = True
-    ) -> Optional[List[Dict[str, Any]]]:
+        fetch: bool = True,
+        readonly: bool = False
+    ) -> Optional[Sequence[Mapping[str, Any]]]:
         """
         Execute a SQL query.
         
@@ -181,21 +260,19 @@ class DatabaseManager:
             query: SQL query string
             params: Query parameters as dict
             fetch: Whether to fetch results
+            readonly: Run on the read engine (replica, if configured)
             
         Returns:
-            List of dictionaries for SELECT queries, None for others
+            List of row mappings (read-only dicts) for SELECT queries, None for others
         """
         try:
-            with self.engine.connect() as conn:
+            engine = self.read_engine if readonly else self.engine
+            with engine.connect() as conn:
                 result = conn.execute(text(query), params or {})
                 
                 if fetch:
-                    # Convert to list of dicts
-                    rows = result.fetchall()
-                    if rows:
-                        columns = result.keys()
-                        return [dict(zip(columns, row)) for row in rows]
-                    return []
+                    # Rows are mapped by column name without copying into dicts
+                    return result.mappings().all()
                 else:
                     conn.commit()
                     return None
@@ -204,6 +281,70 @@ class DatabaseManager:
             logger.error(f"Error executing query: {e}")
             return None
     
+    def execute_query_json(
+        self,
+        query: str,
+        params: dict = None,
+        readonly: bool = True
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Execute a SELECT query with rows aggregated into JSON by the server.
+        
+        The result comes back as a single json value parsed once on the
+        client, which is cheaper than materializing rows for small
+        diagnostic/meta queries.
+        
+        Args:
+            query: SQL SELECT query string
+            params: Query parameters as dict
+            readonly: Run on the read engine (replica, if configured)
+            
+        Returns:
+            List of dictionaries, None on error
+        """
+        try:
+            engine = self.read_engine if readonly else self.engine
+            with engine.connect() as conn:
+                return conn.execute(
+                    text(f"SELECT coalesce(json_agg(t), '[]'::json) FROM ({query}) t"),
+                    params or {}
+                ).scalar()
+                
+        except Exception as e:
+            logger.error(f"Error executing JSON query: {e}")
+            return None
+    
+    def execute_query_arrow(
+        self,
+        query: str,
+        params: Optional[Sequence[Any]] = None
+    ) -> Optional[pa.Table]:
+        """
+        Execute a SELECT query and return the result as a columnar Arrow table.
+        
+        Runs through the ADBC PostgreSQL driver, which decodes the server's
+        binary COPY output straight into Arrow columns, so rows never become
+        Python tuples. Uses the read replica when one is configured.
+        
+        Args:
+            query: SQL query string, with positional parameters as $1, $2, ...
+            params: Positional parameter values
+            
+        Returns:
+            pyarrow Table with one column per selected column, None on error
+        """
+        try:
+            import adbc_driver_postgresql.dbapi
+            
+            with adbc_driver_postgresql.dbapi.connect(self.read_url or postgres_uri()) as conn:
+                with conn.cursor() as cursor:
+                    cursor.execute(query, params)
+                    return cursor.fetch_arrow_table()
+            
+        except Exception as e:
+            logger.error(f"Error executing arrow query: {e}")
+            return None
+    
     def execute_many(
         self,
         query: str,
@@ -227,8 +368,49 @@ class DatabaseManager:
             logger.error(f"Error executing batch query: {e}")
             return False
     
+    def bulk_insert(
+        self,
+        table: str,
+        columns: Sequence[str],
+        rows: Sequence[Sequence[Any]],
+        page_size: int = 1000
+    ) -> bool:
+        """
+        Insert many rows using psycopg2's execute_values.
+        
+        Rows are sent as multi-row INSERT ... VALUES statements, page_size
+        rows per round-trip.
+        
+        Args:
+            table: Target table name
+            columns: Column names, in the order of each row tuple
+            rows: Row tuples to insert
+            page_size: Rows per INSERT statement
+            
+        Returns:
+            True if successful
+        """
+        if not rows:
+            return True
+        
+        query = f"INSERT INTO {table} ({', '.join(columns)}) VALUES %s"
+        conn = self.engine.raw_connection()
+        try:
+            with conn.cursor() as cursor:
+                execute_values(cursor, query, rows, page_size=page_size)
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Error bulk inserting into {table}: {e}")
+            return False
+        finally:
+            conn.close()
+    
     def close(self):
         """Dispose of the engine and close all connections"""
+        if self.read_engine is not None and self.read_engine is not self.engine:
+            self.read_engine.dispose()
         if self.engine:
             self.engine.dispose()
             logger.info("Database engine disposed")
@@ -258,7 +440,7 @@ if __name__ == "__main__":
             print("✓ Schema created successfully")
         
         # Test query
-        tables = db.execute_query("""
+        tables = db.execute_query_json("""
             SELECT table_name 
             FROM information_schema.tables 
             WHERE table_schema = 'public'
@@ -195,7 +195,7 @@ CREATE INDEX idx_cart_abandonments_persona ON cart_abandonments(persona);
 -- REAL-TIME EVENTS LOG (Recent events for dashboard)
 -- ============================================================================
 CREATE TABLE IF NOT EXISTS recent_events (
-    event_id VARCHAR(50) PRIMARY KEY,
+    event_id BIGINT PRIMARY KEY,
     timestamp TIMESTAMP NOT NULL,
     event_type VARCHAR(50) NOT NULL,
     user_id INTEGER NOT NULL,
@@ -3,16 +3,20 @@ Model 4: Hybrid Ensemble - Stacking Meta-Learner
 Combines Random Forest + XGBoost + LightGBM predictions.
 
 Expected Performance: 94-96% accuracy (BEST!)
-Training Time: ~2 minutes
+Training Time: seconds (base models are prefit)
 """
 
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import time
 import joblib
 import numpy as np
+from sklearn import config_context
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import StackingClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.utils.parallel import Parallel, delayed
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -21,28 +25,52 @@ project_root = Path(__file__).parent.parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from ml_models.churn_prediction.utils.data_loader import DataLoader
-from ml_models.churn_prediction.utils.evaluation import ModelEvaluator
+from ml_models.churn_prediction.utils.compiled import load_compiled_predictor
+from ml_models.churn_prediction.utils.evaluation import (
+    ModelEvaluator, MODEL_COMPRESSION, classification_metrics, load_results
+)
+
+
+def load_base_model(model_path):
+    """
+    Load one trained base model (joblib pickle, or XGBoost's native format).
+    
+    A missing .ubj falls back to the .pkl saved by earlier training runs.
+    """
+    if model_path.suffix == '.ubj' and not model_path.exists():
+        model_path = model_path.with_suffix('.pkl')
+    if model_path.suffix == '.ubj':
+        import xgboost as xgb
+        
+        model = xgb.XGBClassifier()
+        model.load_model(model_path)
+        return model
+    return joblib.load(model_path)
 
 
 def load_base_models():
-    """Load all trained base models"""
+    """Load all trained base models (in parallel; loading is mostly IO and decompression)"""
     model_dir = Path(__file__).parent.parent / "trained_models"
     
     models = {}
     model_files = {
         'random_forest': 'random_forest_v1.pkl',
-        'xgboost': 'xgboost_v1.pkl',
+        'xgboost': 'xgboost_v1.ubj',
         'lightgbm': 'lightgbm_v1.pkl'
     }
     
     print("\n📦 Loading Base Models...")
-    for name, filename in model_files.items():
-        try:
-            model_path = model_dir / filename
-            models[name] = joblib.load(model_path)
-            print(f"   ✓ Loaded {name}")
-        except Exception as e:
-            print(f"   ✗ Could not load {name}: {e}")
+    with ThreadPoolExecutor(max_workers=len(model_files)) as executor:
+        futures = {
+            name: executor.submit(load_base_model, model_dir / filename)
+            for name, filename in model_files.items()
+        }
+        for name, future in futures.items():
+            try:
+                models[name] = future.result()
+                print(f"   ✓ Loaded {name}")
+            except Exception as e:
+                print(f"   ✗ Could not load {name}: {e}")
     
     return models
 
@@ -92,7 +120,7 @@ def train_hybrid_ensemble():
     stacking_clf = StackingClassifier(
         estimators=estimators,
         final_estimator=LogisticRegression(random_state=42, max_iter=1000),
-        cv=5,  # 5-fold cross-validation
+        cv='prefit',  # Base models are already trained; only fit the meta-learner
         stack_method='predict_proba',  # Use probabilities for stacking
         n_jobs=-1
     )
@@ -101,12 +129,14 @@ def train_hybrid_ensemble():
     # STEP 4: Train ensemble
     # ========================================
     print("\n🎓 STEP 4: Training Hybrid Ensemble...")
-    print("   This may take 1-2 minutes...")
+    print("   Fitting the meta-learner on the prefit base models...")
     
     start_time = time.time()
     
-    # Fit stacking ensemble
-    stacking_clf.fit(X_train, y_train)
+    # Fit stacking ensemble. The inputs come from the preprocessed split and
+    # model probabilities, so sklearn's per-call NaN/inf scans are skipped
+    with config_context(assume_finite=True):
+        stacking_clf.fit(X_train, y_train)
     
     training_time = time.time() - start_time
     
@@ -117,9 +147,27 @@ def train_hybrid_ensemble():
     # ========================================
     print("\n📊 STEP 5: Evaluating Hybrid Ensemble...")
     
-    # Predictions
-    y_pred = stacking_clf.predict(X_test)
-    y_pred_proba = stacking_clf.predict_proba(X_test)[:, 1]
+    # Each base model scores the test set once; the cached probabilities feed
+    # both the meta-learner and the per-model table in STEP 6. The models
+    # predict in native code that releases the GIL, so threads run them in parallel.
+    # Models compiled by compile_models.py score through their native library
+    fitted_models = stacking_clf.named_estimators_
+    scorers = {}
+    for name, model in fitted_models.items():
+        compiled = load_compiled_predictor(name)
+        scorers[name] = compiled if compiled is not None else model
+        if compiled is not None:
+            print(f"   ⚙️  Scoring {name} with compiled library {compiled.libpath.name}")
+    with config_context(assume_finite=True):
+        probas = Parallel(n_jobs=len(scorers), prefer='threads')(
+            delayed(scorer.predict_proba)(X_test) for scorer in scorers.values()
+        )
+        base_probas = {name: proba[:, 1] for name, proba in zip(scorers, probas)}
+        
+        # Same meta-features stacking_clf.predict_proba would build (binary: P(class 1))
+        stacked = np.column_stack([base_probas[name] for name, _ in estimators])
+        y_pred_proba = stacking_clf.final_estimator_.predict_proba(stacked)[:, 1]
+    y_pred = (y_pred_proba > 0.5).astype(int)
     
     # Evaluate
     evaluator = ModelEvaluator('hybrid_ensemble')
@@ -133,13 +181,11 @@ def train_hybrid_ensemble():
     print(f"\n   {'Model':<20} {'Accuracy':<12} {'Precision':<12} {'Recall':<12}")
     print(f"   {'-'*56}")
     
-    for name, model in base_models.items():
-        y_pred_base = model.predict(X_test)
-        from sklearn.metrics import accuracy_score, precision_score, recall_score
+    for name, y_proba_base in base_probas.items():
+        y_pred_base = (y_proba_base > 0.5).astype(int)
         
-        acc = accuracy_score(y_test, y_pred_base)
-        prec = precision_score(y_test, y_pred_base)
-        rec = recall_score(y_test, y_pred_base)
+        metrics = classification_metrics(y_test, y_pred_base)
+        acc, prec, rec = metrics['accuracy'], metrics['precision'], metrics['recall']
         
         print(f"   {name:<20} {acc:<12.4f} {prec:<12.4f} {rec:<12.4f}")
     
@@ -173,16 +219,23 @@ def train_hybrid_ensemble():
     model_path = model_dir / "hybrid_ensemble_v1.pkl"
     
     # Save complete ensemble
-    joblib.dump(stacking_clf, model_path)
+    joblib.dump(stacking_clf, model_path, compress=MODEL_COMPRESSION, protocol=5)
     print(f"   Ensemble saved to: {model_path}")
     
+    # Serving version: takes engineered rows and does the scaling/encoding
+    # itself in one pass before the base models
+    pipeline_path = model_dir / "hybrid_ensemble_pipeline_v1.pkl"
+    serving_pipeline = Pipeline([('prep', loader.preprocessor), ('clf', stacking_clf)])
+    joblib.dump(serving_pipeline, pipeline_path, compress=MODEL_COMPRESSION, protocol=5)
+    print(f"   Serving pipeline saved to: {pipeline_path}")
+    
     # Prepare metadata
     additional_info = {
         'base_models': list(base_models.keys()),
         'n_base_models': len(base_models),
         'meta_learner': 'LogisticRegression',
         'stacking_method': 'predict_proba',
-        'cv_folds': 5,
+        'cv_folds': 'prefit',
         'training_time_seconds': float(training_time),
         'model_weights': dict(zip(model_names, weights.tolist())) if hasattr(meta_model, 'coef_') else None
     }
@@ -196,9 +249,6 @@ def train_hybrid_ensemble():
     print("\n📊 STEP 9: Complete Model Comparison...")
     
     try:
-        import json
-        results_dir = Path(__file__).parent.parent / "results"
-        
         print(f"\n   {'Model':<20} {'Accuracy':<12} {'Precision':<12} {'Recall':<12} {'F1':<12}")
         print(f"   {'-'*68}")
         
@@ -206,12 +256,8 @@ def train_hybrid_ensemble():
         best_accuracy = 0
         best_model = ""
         
-        for model_name in all_models:
-            result_file = results_dir / f"{model_name}_results.json"
-            if result_file.exists():
-                with open(result_file, 'r') as f:
-                    model_results = json.load(f)
-                
+        for model_name, model_results in load_results(all_models).items():
+            if model_results is not None:
                 acc = model_results['accuracy']
                 if acc > best_accuracy:
                     best_accuracy = acc
@@ -244,7 +290,7 @@ def train_hybrid_ensemble():
     print(f"   ✓ Base Models: {len(base_models)} ({', '.join(base_models.keys())})")
     print(f"   ✓ Meta-Learner: Logistic Regression")
     print(f"   ✓ Stacking Method: Probability-based")
-    print(f"   ✓ Cross-Validation: 5-fold")
+    print(f"   ✓ Base Models: prefit (no cross-validation refits)")
     print(f"   ✓ Training Time: {training_time:.2f} seconds")
     
     print(f"\n💾 Outputs:")
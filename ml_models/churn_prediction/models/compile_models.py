@@ -0,0 +1,119 @@
+"""
+Compile Trained Models to Native Predictors
+Compiles the Random Forest, XGBoost and LightGBM models into shared libraries
+with Treelite + TL2cgen.
+
+The compiled predictors walk the trees in generated C code with batched
+traversal instead of the Python/Cython object graph, which cuts prediction
+latency several-fold for both batch scoring and serving.
+"""
+
+import sys
+from pathlib import Path
+import time
+import joblib
+import numpy as np
+import warnings
+warnings.filterwarnings('ignore')
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ml_models.churn_prediction.utils.data_loader import DataLoader
+from ml_models.churn_prediction.utils.compiled import COMPILED_DIR, MODEL_DIR, CompiledPredictor
+
+
+def import_treelite_model(name: str):
+    """
+    Load a trained base model and convert it to a Treelite model.
+    
+    Args:
+        name: 'random_forest', 'xgboost' or 'lightgbm'
+    
+    Returns:
+        (treelite.Model, fitted sklearn-API model used as the reference)
+    """
+    import treelite
+    
+    # XGBoost is saved in its native format; older runs left a .pkl instead
+    if name == 'xgboost' and (MODEL_DIR / "xgboost_v1.ubj").exists():
+        import xgboost as xgb
+        
+        model = xgb.XGBClassifier()
+        model.load_model(MODEL_DIR / "xgboost_v1.ubj")
+        return treelite.frontend.from_xgboost(model.get_booster()), model
+    
+    model = joblib.load(MODEL_DIR / f"{name}_v1.pkl")
+    if name == 'xgboost':
+        return treelite.frontend.from_xgboost(model.get_booster()), model
+    if name == 'lightgbm':
+        return treelite.frontend.from_lightgbm(model.booster_), model
+    return treelite.sklearn.import_model(model), model
+
+
+def compile_models(parallel_comp: int = 32):
+    """
+    Compile every trained base model and check it against the original.
+    
+    Args:
+        parallel_comp: Number of C files the generated code is split into
+            (compiled in parallel)
+    
+    Returns:
+        Dictionary mapping model name to compiled library path
+    """
+    import tl2cgen
+    
+    print("="*70)
+    print("⚙️  COMPILING MODELS TO NATIVE PREDICTORS")
+    print("="*70)
+    
+    loader = DataLoader()
+    X_train, X_test, y_train, y_test, feature_names = loader.get_train_test_split()
+    X_check = np.ascontiguousarray(X_test, dtype=np.float32)
+    
+    COMPILED_DIR.mkdir(parents=True, exist_ok=True)
+    libraries = {}
+    
+    for name in ('random_forest', 'xgboost', 'lightgbm'):
+        try:
+            tl_model, model = import_treelite_model(name)
+        except Exception as e:
+            print(f"   ✗ Skipping {name}: {e}")
+            continue
+        
+        libpath = COMPILED_DIR / f"{name}_v1.so"
+        start_time = time.time()
+        tl2cgen.export_lib(
+            tl_model,
+            toolchain='gcc',
+            libpath=str(libpath),
+            params={'parallel_comp': parallel_comp}
+        )
+        compile_time = time.time() - start_time
+        
+        # The compiled predictor must reproduce the original probabilities
+        predictor = CompiledPredictor(libpath)
+        start_time = time.time()
+        compiled_proba = predictor.predict_proba(X_check)[:, 1]
+        compiled_time = time.time() - start_time
+        
+        start_time = time.time()
+        reference_proba = model.predict_proba(X_test)[:, 1]
+        reference_time = time.time() - start_time
+        
+        max_diff = float(np.max(np.abs(compiled_proba - reference_proba)))
+        print(f"   ✓ {name}: {libpath.name} (compiled in {compile_time:.1f}s)")
+        print(f"     Test-set scoring: {reference_time*1000:.1f} ms -> {compiled_time*1000:.1f} ms, "
+              f"max |Δp| = {max_diff:.2e}")
+        
+        libraries[name] = libpath
+    
+    print("="*70 + "\n")
+    
+    return libraries
+
+
+if __name__ == "__main__":
+    libraries = compile_models()
@@ -0,0 +1,169 @@
+"""
+Model Family Selection
+Runs one successive-halving search across Random Forest, XGBoost and LightGBM
+to find which family is worth tuning in depth.
+
+All three families share one joblib pool and one halving schedule, so the
+compute budget flows to the most promising candidates whatever their family.
+The per-model scripts (01-03) still do the full tuning and save the models.
+"""
+
+import sys
+from pathlib import Path
+import time
+from scipy.stats import loguniform, randint, uniform
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.model_selection import HalvingRandomSearchCV
+from sklearn.pipeline import Pipeline
+import warnings
+warnings.filterwarnings('ignore')
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ml_models.churn_prediction.utils.data_loader import DataLoader, CV_FOLDS
+from ml_models.churn_prediction.utils.evaluation import json_default
+
+# Candidates sampled across all families
+N_SEARCH_ITER = 90
+
+
+def family_distributions():
+    """
+    Build one parameter-distribution dict per model family.
+    
+    Each dict fixes the pipeline's 'clf' step to one estimator and samples
+    its hyperparameters over the ranges used by the per-model scripts.
+    
+    Returns:
+        List of distribution dicts for HalvingRandomSearchCV
+    """
+    distributions = [{
+        'clf': [RandomForestClassifier(random_state=42, n_jobs=1)],
+        'clf__n_estimators': randint(100, 301),
+        'clf__max_depth': [10, 20, 30, None],
+        'clf__min_samples_split': randint(2, 11),
+        'clf__min_samples_leaf': randint(1, 5),
+        'clf__max_features': ['sqrt', 'log2'],
+        'clf__class_weight': ['balanced', None]
+    }]
+    
+    try:
+        import xgboost as xgb
+        distributions.append({
+            'clf': [xgb.XGBClassifier(
+                objective='binary:logistic', tree_method='hist',
+                random_state=42, n_jobs=1, verbosity=0
+            )],
+            'clf__n_estimators': randint(100, 501),
+            'clf__max_depth': randint(3, 11),
+            'clf__learning_rate': loguniform(1e-2, 2e-1),
+            'clf__subsample': uniform(0.7, 0.3),
+            'clf__colsample_bytree': uniform(0.7, 0.3),
+            'clf__min_child_weight': randint(1, 6)
+        })
+    except ImportError:
+        print("   ⚠️  xgboost not installed, skipping XGBoost family")
+    
+    try:
+        import lightgbm as lgb
+        distributions.append({
+            'clf': [lgb.LGBMClassifier(
+                objective='binary', random_state=42, n_jobs=1, verbose=-1
+            )],
+            'clf__n_estimators': randint(100, 501),
+            'clf__max_depth': randint(7, 16),
+            'clf__learning_rate': loguniform(0.05, 0.1),
+            'clf__num_leaves': randint(31, 64),
+            'clf__min_child_samples': randint(20, 31),
+            'clf__colsample_bytree': uniform(0.8, 0.1)
+        })
+    except ImportError:
+        print("   ⚠️  lightgbm not installed, skipping LightGBM family")
+    
+    return distributions
+
+
+def select_model_family(n_jobs: int = -1):
+    """
+    Search all model families at once with successive halving.
+    
+    Args:
+        n_jobs: Parallel fits for the search (-1 = all cores)
+    
+    Returns:
+        Fitted HalvingRandomSearchCV
+    """
+    print("="*70)
+    print("🧭 MODEL FAMILY SELECTION")
+    print("="*70)
+    
+    print("\n📂 STEP 1: Loading Data...")
+    loader = DataLoader()
+    X_train, X_test, y_train, y_test, feature_names = loader.get_train_test_split()
+    
+    print("\n🔍 STEP 2: Searching All Families (HalvingRandomSearchCV)...")
+    distributions = family_distributions()
+    print(f"   Families: {len(distributions)}")
+    print(f"   Sampling {N_SEARCH_ITER} candidates across families")
+    
+    search = HalvingRandomSearchCV(
+        estimator=Pipeline([('clf', RandomForestClassifier())]),
+        param_distributions=distributions,
+        n_candidates=N_SEARCH_ITER,
+        factor=3,
+        resource='n_samples',
+        min_resources='exhaust',
+        cv=CV_FOLDS,
+        scoring='f1',
+        random_state=42,
+        n_jobs=n_jobs,
+        verbose=1
+    )
+    
+    start_time = time.time()
+    search.fit(X_train, y_train)
+    search_time = time.time() - start_time
+    
+    # Best candidate per family from the final rung each family reached
+    print("\n🏆 STEP 3: Best Candidate per Family:")
+    cv_results = search.cv_results_
+    best_by_family = {}
+    for i, clf in enumerate(cv_results['param_clf']):
+        family = type(clf).__name__
+        score = cv_results['mean_test_score'][i]
+        rung = cv_results['iter'][i]
+        if family not in best_by_family or (rung, score) > best_by_family[family][:2]:
+            best_by_family[family] = (rung, score)
+    
+    for family, (rung, score) in sorted(best_by_family.items(), key=lambda x: x[1], reverse=True):
+        print(f"   {family:<25} F1={score:.4f} (reached rung {rung})")
+    
+    best_family = type(search.best_params_['clf']).__name__
+    print(f"\n   Winner: {best_family} (CV F1-Score: {search.best_score_:.4f})")
+    print(f"   Search time: {search_time/60:.2f} minutes")
+    
+    # Save a summary next to the per-model results
+    import json
+    results_dir = Path(__file__).parent.parent / "results"
+    results_dir.mkdir(parents=True, exist_ok=True)
+    summary = {
+        'best_family': best_family,
+        'best_cv_f1_score': search.best_score_,
+        'best_params': {k: v for k, v in search.best_params_.items() if k != 'clf'},
+        'families': {family: {'rung': rung, 'cv_f1_score': score}
+                     for family, (rung, score) in best_by_family.items()},
+        'search_time_seconds': search_time
+    }
+    with open(results_dir / "model_family_selection.json", 'w') as f:
+        json.dump(summary, f, indent=2, default=json_default)
+    
+    print("="*70 + "\n")
+    
+    return search
+
+
+if __name__ == "__main__":
+    search = select_model_family()
@@ -0,0 +1,80 @@
+"""
+Train All Churn Models
+Trains Random Forest, XGBoost and LightGBM concurrently, then the stacking
+ensemble on top of them.
+
+The three base models are independent, so they run as separate processes that
+share the cached train/test split. Each gets an equal slice of the CPU cores
+for its hyperparameter search.
+"""
+
+import sys
+import os
+import time
+import importlib
+from pathlib import Path
+from joblib import Parallel, delayed
+
+# Add project root to path
+project_root = Path(__file__).parent.parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from ml_models.churn_prediction.utils.data_loader import DataLoader
+
+BASE_MODEL_TRAINERS = [
+    ('01_random_forest', 'train_random_forest'),
+    ('02_xgboost', 'train_xgboost'),
+    ('03_lightgbm', 'train_lightgbm'),
+]
+
+
+def _load_trainer(module_name: str, function_name: str):
+    """Import a training function from one of the numbered model scripts"""
+    module = importlib.import_module(f"ml_models.churn_prediction.models.{module_name}")
+    return getattr(module, function_name)
+
+
+def train_all(include_ensemble: bool = True):
+    """
+    Train the base models in parallel, then the hybrid ensemble.
+    
+    Args:
+        include_ensemble: Train the stacking ensemble once the base models are saved
+    
+    Returns:
+        Dictionary of results per model
+    """
+    print("\n" + "="*70)
+    print("🚀 TRAINING ALL CHURN MODELS")
+    print("="*70)
+    
+    # Populate the split cache once so the workers only read it
+    DataLoader().get_train_test_split()
+    
+    n_models = len(BASE_MODEL_TRAINERS)
+    jobs_per_model = max(1, (os.cpu_count() or 1) // n_models)
+    print(f"\n⚡ Running {n_models} trainers in parallel ({jobs_per_model} cores each)...")
+    
+    start_time = time.time()
+    trainers = [_load_trainer(module, function) for module, function in BASE_MODEL_TRAINERS]
+    outputs = Parallel(n_jobs=n_models, backend='loky')(
+        delayed(trainer)(n_jobs=jobs_per_model) for trainer in trainers
+    )
+    
+    all_results = {
+        module: results for (module, _), (_, results) in zip(BASE_MODEL_TRAINERS, outputs)
+    }
+    print(f"✓ Base models trained in {time.time() - start_time:.2f} seconds")
+    
+    if include_ensemble:
+        train_hybrid_ensemble = _load_trainer('04_hybrid_ensemble', 'train_hybrid_ensemble')
+        _, all_results['04_hybrid_ensemble'] = train_hybrid_ensemble()
+    
+    print(f"\n⏱️  Total Training Time: {time.time() - start_time:.2f} seconds")
+    print("="*70 + "\n")
+    
+    return all_results
+
+
+if __name__ == "__main__":
+    results = train_all()
@@ -0,0 +1,44 @@
+"""
+Shared Training Caches
+Booster training sets built once per process and reused by every trainer.
+"""
+
+from functools import lru_cache
+
+from ml_models.churn_prediction.utils.data_loader import DataLoader, quantile_bin
+
+
+@lru_cache(maxsize=1)
+def get_xgb_dmatrix():
+    """
+    Get the XGBoost DMatrix for the training split.
+    
+    The features are uint8 quantile codes (see quantile_bin), which split
+    identically to the raw features, so the quantile sketch is built once.
+    
+    Returns:
+        xgb.DMatrix of the training set
+    """
+    import xgboost as xgb
+    
+    X_train, _, y_train, _, _ = DataLoader().get_train_test_split()
+    return xgb.DMatrix(quantile_bin(X_train), label=y_train)
+
+
+@lru_cache(maxsize=1)
+def get_lgb_dataset():
+    """
+    Get the LightGBM Dataset for the training split.
+    
+    Built from the same uint8 quantile codes; LightGBM bins it on first use
+    and every later lgb.cv call reuses those bins.
+    
+    Returns:
+        lgb.Dataset of the training set
+    """
+    import lightgbm as lgb
+    
+    X_train, _, y_train, _, _ = DataLoader().get_train_test_split()
+    return lgb.Dataset(
+        quantile_bin(X_train), label=y_train, params={'max_bin': 255}, free_raw_data=False
+    )
@@ -0,0 +1,62 @@
+"""
+Compiled Model Predictors
+Loads the Treelite/TL2cgen shared libraries written by models/compile_models.py.
+Callers fall back to the pickled model when no library is available.
+"""
+
+import importlib.util
+from pathlib import Path
+
+import numpy as np
+
+MODEL_DIR = Path(__file__).parent.parent / "trained_models"
+COMPILED_DIR = MODEL_DIR / "compiled"
+
+
+class CompiledPredictor:
+    """Compiled tree model with the predict_proba interface of the original"""
+    
+    def __init__(self, libpath: Path):
+        """
+        Load a compiled model.
+        
+        Args:
+            libpath: Shared library exported by tl2cgen.export_lib
+        """
+        import tl2cgen
+        
+        self._dmatrix = tl2cgen.DMatrix
+        self.libpath = libpath
+        self.predictor = tl2cgen.Predictor(str(libpath))
+    
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Predict class probabilities.
+        
+        Args:
+            X: Feature matrix (DataFrame or array) in the model's feature order
+        
+        Returns:
+            Array of shape (n_samples, 2) like sklearn's predict_proba
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        output = np.asarray(self.predictor.predict(self._dmatrix(X)))
+        positive = output.reshape(len(X), -1)[:, -1]
+        return np.column_stack([1.0 - positive, positive])
+
+
+def load_compiled_predictor(name: str):
+    """
+    Load the compiled library for a trained model if it exists.
+    
+    Args:
+        name: 'random_forest', 'xgboost' or 'lightgbm'
+    
+    Returns:
+        CompiledPredictor, or None if the library or tl2cgen is missing
+    """
+    libpath = COMPILED_DIR / f"{name}_v1.so"
+    if not libpath.exists() or importlib.util.find_spec('tl2cgen') is None:
+        return None
+    return CompiledPredictor(libpath)
+
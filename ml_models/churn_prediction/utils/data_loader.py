@@ -3,14 +3,149 @@ Data Loader and Preprocessing Utilities
 Shared across all models for consistency.
 """
 
+import hashlib
+import joblib
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from pathlib import Path
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
+from sklearn.model_selection import StratifiedKFold, StratifiedShuffleSplit
+from sklearn.pipeline import make_pipeline
+from sklearn.compose import ColumnTransformer
+from sklearn.impute import SimpleImputer
+from sklearn.preprocessing import FunctionTransformer, OrdinalEncoder, StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
+# Bump when the cached split's contents change (e.g. dtype) to invalidate old caches
+SPLIT_CACHE_VERSION = 8
+
+# Cross-validation folds shared by every model's search, so CV scores are
+# computed on identical splits and comparable across models
+CV_FOLDS = StratifiedKFold(n_splits=3, shuffle=True, random_state=42)
+
+# Columns read from the training CSV and their dtypes. Counts fit in int32 and
+# the low-cardinality strings load as categoricals instead of Python objects
+CSV_DTYPES = {
+    'page_views': 'int32',
+    'products_viewed': 'int32',
+    'unique_products_viewed': 'int32',
+    'searches': 'int32',
+    'cart_additions': 'int32',
+    'cart_removals': 'int32',
+    'cart_value': 'float32',
+    'session_duration_seconds': 'float32',
+    'avg_time_per_page': 'float32',
+    'device_type': 'category',
+    'browser': 'category',
+    'persona': 'category',
+    'is_converted': 'bool',
+    'checkout_initiated': 'bool',
+    'bounce': 'bool'
+}
+
+# Category for missing categorical values. The LabelEncoder baseline encoded
+# astype(str) values, which on the pinned pandas turns NaN into the string
+# 'nan', so missing values get that category at its sorted position
+MISSING_CATEGORY = 'nan'
+
+# Model input features, in the column order of the preprocessed matrix
+NUMERICAL_FEATURES = [
+    'page_views',
+    'products_viewed',
+    'unique_products_viewed',
+    'searches',
+    'cart_additions',
+    'cart_removals',
+    'cart_value',
+    'session_duration_seconds',
+    'avg_time_per_page',
+    'engagement_score',
+    'cart_engagement',
+    'time_per_product',
+    'cart_to_checkout_rate',
+    'pages_per_minute',
+    'unique_product_ratio'
+]
+
+CATEGORICAL_FEATURES = [
+    'device_type',
+    'browser',
+    'persona'
+]
+
+BINARY_FEATURES = [
+    'bounce',
+    'checkout_initiated'
+]
+
+# In-process copy of loaded splits, keyed by cache path, shared by all DataLoaders
+_split_memo = {}
+
+
+def quantile_bin(X, n_bins: int = 256) -> np.ndarray:
+    """
+    Replace each feature by the index of its quantile bin.
+    
+    Histogram-based boosters only look at feature order within at most 256
+    bins, so searching on these uint8 codes finds the same splits as on the
+    raw floats while moving 8x less data. Models used on raw features must be
+    refit on the unbinned matrix.
+    
+    Args:
+        X: Feature matrix (DataFrame or array)
+        n_bins: Number of bins per feature (at most 256)
+        
+    Returns:
+        C-contiguous uint8 array with the same shape as X
+    """
+    X = np.asarray(X, dtype=np.float64)
+    inner_quantiles = np.linspace(0, 1, n_bins + 1)[1:-1]
+    
+    binned = np.empty(X.shape, dtype=np.uint8)
+    for j in range(X.shape[1]):
+        edges = np.unique(np.quantile(X[:, j], inner_quantiles))
+        binned[:, j] = np.searchsorted(edges, X[:, j], side='right')
+    return binned
+
+
+@lru_cache(maxsize=1)
+def fused_feature_kernel():
+    """
+    Compile the engineered-feature formulas into one Numba kernel.
+    
+    The kernel computes all six arithmetic features in a single parallel pass
+    over the source columns, instead of one NumPy pass (and temporary array)
+    per operator.
+    
+    Returns:
+        Kernel (pv, prod, uniq, searches, adds, removes, duration, checkout,
+        *outputs) -> None, or None if Numba is not installed
+    """
+    try:
+        from numba import njit, prange
+    except ImportError:
+        return None
+    
+    @njit(parallel=True, cache=True)
+    def kernel(page_views, products_viewed, unique_products_viewed, searches,
+               cart_additions, cart_removals, session_duration, checkout_initiated,
+               engagement_score, cart_engagement, time_per_product,
+               cart_to_checkout_rate, pages_per_minute, unique_product_ratio):
+        for i in prange(page_views.shape[0]):
+            products_plus_one = products_viewed[i] + 1.0
+            engagement_score[i] = (
+                page_views[i] * 0.3 + products_viewed[i] * 0.4 + searches[i] * 0.3
+            )
+            cart_engagement[i] = cart_additions[i] - cart_removals[i]
+            time_per_product[i] = session_duration[i] / products_plus_one
+            cart_to_checkout_rate[i] = checkout_initiated[i] / (cart_additions[i] + 1.0)
+            pages_per_minute[i] = page_views[i] / (session_duration[i] / 60.0 + 1.0)
+            unique_product_ratio[i] = unique_products_viewed[i] / products_plus_one
+    
+    return kernel
+
+
 class DataLoader:
     """
     Load and preprocess training data for ML models.
@@ -22,21 +157,34 @@ class DataLoader:
         Initialize data loader.
         
         Args:
-            data_path: Path to training_data_latest.csv
+            data_path: Path to training_data_latest.parquet or .csv
         """
         if data_path is None:
-            # Default path
+            # Default path (the Parquet export if there is one, else the CSV)
             project_root = Path(__file__).parent.parent.parent.parent
-            data_path = project_root / "ml_models" / "churn_prediction" / "data" / "training_data_latest.csv"
+            data_dir = project_root / "ml_models" / "churn_prediction" / "data"
+            data_path = data_dir / "training_data_latest.parquet"
+            if not data_path.exists():
+                data_path = data_dir / "training_data_latest.csv"
         
         self.data_path = Path(data_path)
-        self.label_encoders = {}
+        self.cache_dir = self.data_path.parent / ".cache"
+        self.categories_ = {}
         self.scaler = StandardScaler()
+        self.preprocessor = None
         
     def load_data(self):
-        """Load CSV data"""
+        """Load Parquet or CSV data (only the model's columns, with the multi-threaded Arrow reader)"""
         print(f"📂 Loading data from: {self.data_path}")
-        df = pd.read_csv(self.data_path)
+        if self.data_path.suffix == '.parquet':
+            df = pd.read_parquet(self.data_path, columns=list(CSV_DTYPES)).astype(CSV_DTYPES)
+        else:
+            df = pd.read_csv(
+                self.data_path,
+                engine='pyarrow',
+                usecols=list(CSV_DTYPES),
+                dtype=CSV_DTYPES
+            )
         print(f"✅ Loaded {len(df):,} sessions")
         return df
     
@@ -52,33 +200,65 @@ class DataLoader:
         """
         print("🔧 Engineering features...")
         
-        # 1. Calculate abandonment target (our main prediction target)
-        df['abandoned'] = (df['cart_value'] > 0) & (~df['is_converted'])
+        # Pull each source column out once; every feature below is computed
+        # from these arrays
+        page_views = df['page_views'].to_numpy()
+        products_viewed = df['products_viewed'].to_numpy()
+        unique_products_viewed = df['unique_products_viewed'].to_numpy()
+        searches = df['searches'].to_numpy()
+        cart_additions = df['cart_additions'].to_numpy()
+        cart_removals = df['cart_removals'].to_numpy()
+        session_duration = df['session_duration_seconds'].to_numpy()
+        checkout_initiated = df['checkout_initiated'].to_numpy(dtype=np.int8)
         
-        # 2. Engagement score (composite metric)
-        df['engagement_score'] = (
-            df['page_views'] * 0.3 +
-            df['products_viewed'] * 0.4 +
-            df['searches'] * 0.3
-        )
-        
-        # 3. Cart engagement
-        df['cart_engagement'] = df['cart_additions'] - df['cart_removals']
-        
-        # 4. Time efficiency
-        df['time_per_product'] = df['session_duration_seconds'] / (df['products_viewed'] + 1)
+        kernel = fused_feature_kernel()
+        if kernel is not None:
+            # Features 2-7 in one fused pass
+            n_rows = len(df)
+            features = {
+                'engagement_score': np.empty(n_rows),
+                'cart_engagement': np.empty(n_rows, dtype=cart_additions.dtype),
+                'time_per_product': np.empty(n_rows),
+                'cart_to_checkout_rate': np.empty(n_rows),
+                'pages_per_minute': np.empty(n_rows),
+                'unique_product_ratio': np.empty(n_rows)
+            }
+            kernel(
+                page_views, products_viewed, unique_products_viewed, searches,
+                cart_additions, cart_removals, session_duration, checkout_initiated,
+                *features.values()
+            )
+        else:
+            features = {
+                # 2. Engagement score (composite metric)
+                'engagement_score': (
+                    page_views * 0.3 +
+                    products_viewed * 0.4 +
+                    searches * 0.3
+                ),
+                
+                # 3. Cart engagement
+                'cart_engagement': cart_additions - cart_removals,
+                
+                # 4. Time efficiency
+                'time_per_product': session_duration / (products_viewed + 1),
+                
+                # 5. Cart conversion likelihood
+                'cart_to_checkout_rate': checkout_initiated / (cart_additions + 1),
+                
+                # 6. Browsing intensity
+                'pages_per_minute': page_views / (session_duration / 60 + 1),
+                
+                # 7. Product interest depth
+                'unique_product_ratio': unique_products_viewed / (products_viewed + 1)
+            }
         
-        # 5. Cart conversion likelihood
-        df['cart_to_checkout_rate'] = (
-            df['checkout_initiated'].astype(int) / (df['cart_additions'] + 1)
+        df = df.assign(
+            # 1. Calculate abandonment target (our main prediction target)
+            abandoned=(df['cart_value'].to_numpy() > 0) & ~df['is_converted'].to_numpy(dtype=bool),
+            **features
         )
         
-        # 6. Browsing intensity
-        df['pages_per_minute'] = df['page_views'] / (df['session_duration_seconds'] / 60 + 1)
-        
-        # 7. Product interest depth
-        df['unique_product_ratio'] = df['unique_products_viewed'] / (df['products_viewed'] + 1)
-        
         print(f"✅ Created 7 new features")
         return df
     
@@ -91,62 +271,55 @@ class DataLoader:
             fit: If True, fit encoders/scalers. If False, use existing.
             
         Returns:
-            X (features), y (target)
+            X (float32 features), y (target), feature names
         """
         print("⚙️  Preprocessing features...")
         
         # Select features
-        numerical_features = [
-            'page_views',
-            'products_viewed',
-            'unique_products_viewed',
-            'searches',
-            'cart_additions',
-            'cart_removals',
-            'cart_value',
-            'session_duration_seconds',
-            'avg_time_per_page',
-            'engagement_score',
-            'cart_engagement',
-            'time_per_product',
-            'cart_to_checkout_rate',
-            'pages_per_minute',
-            'unique_product_ratio'
-        ]
-        
-        categorical_features = [
-            'device_type',
-            'browser',
-            'persona'
-        ]
-        
-        binary_features = [
-            'bounce',
-            'checkout_initiated'
-        ]
-        
-        # Handle categorical encoding
-        df_encoded = df.copy()
-        
-        for col in categorical_features:
-            if fit:
-                self.label_encoders[col] = LabelEncoder()
-                df_encoded[col] = self.label_encoders[col].fit_transform(df[col].astype(str))
-            else:
-                df_encoded[col] = self.label_encoders[col].transform(df[col].astype(str))
+        numerical_features = NUMERICAL_FEATURES
+        categorical_features = CATEGORICAL_FEATURES
+        binary_features = BINARY_FEATURES
         
-        # Combine all features
+        # Fill one preallocated float32 matrix instead of copying the dataframe.
+        # Column-major, so each feature (and the numerical block) is contiguous
         feature_columns = numerical_features + categorical_features + binary_features
-        X = df_encoded[feature_columns]
+        n_numerical = len(numerical_features)
+        n_encoded = n_numerical + len(categorical_features)
+        
+        X = np.empty((len(df), len(feature_columns)), dtype=np.float32, order='F')
+        X[:, :n_numerical] = df[numerical_features].to_numpy(dtype=np.float32)
         
-        # Scale numerical features
+        # Category codes against the categories seen at fit time (sorted, so
+        # the codes match what LabelEncoder produced); missing values are
+        # MISSING_CATEGORY, sorted in with the rest, and unseen values become -1.
+        # load_data already reads these as category, so only the small
+        # categories index is remapped, never the per-row strings
+        for i, col in enumerate(categorical_features, start=n_numerical):
+            values = df[col]
+            if not isinstance(values.dtype, pd.CategoricalDtype):
+                values = values.astype('category')
+            if fit:
+                categories = values.cat.categories
+                if values.hasnans:
+                    categories = categories.append(pd.Index([MISSING_CATEGORY]))
+                self.categories_[col] = categories.sort_values()
+            if values.hasnans:
+                values = values.cat.add_categories(MISSING_CATEGORY).fillna(MISSING_CATEGORY)
+            X[:, i] = values.cat.set_categories(self.categories_[col]).cat.codes
+        
+        X[:, n_encoded:] = df[binary_features].to_numpy(dtype=np.float32)
+        
+        # Scale numerical features in place
+        numerical_block = X[:, :n_numerical]
         if fit:
-            X[numerical_features] = self.scaler.fit_transform(X[numerical_features])
-        else:
-            X[numerical_features] = self.scaler.transform(X[numerical_features])
+            self.scaler.fit(numerical_block)
+        X[:, :n_numerical] = self.scaler.transform(numerical_block, copy=False)
+        
+        # Wrap without copying so the models keep their feature names
+        X = pd.DataFrame(X, columns=feature_columns, copy=False)
         
-        # Target variable
-        y = df_encoded['abandoned'].astype(int)
+        # Target variable (0/1 fits in a byte)
+        y = df['abandoned'].astype(np.int8)
         
         print(f"✅ Preprocessed {len(feature_columns)} features")
         print(f"   - Numerical: {len(numerical_features)}")
@@ -155,17 +328,86 @@ class DataLoader:
         
         return X, y, feature_columns
     
-    def get_train_test_split(self, test_size=0.2, random_state=42):
+    def build_preprocessor(self, df):
+        """
+        Fit a ColumnTransformer that reproduces preprocess_features.
+        
+        Serving code can put it in front of a trained model as a Pipeline
+        step, so raw engineered rows go through one consolidated
+        scale/encode pass per prediction instead of replaying the loader.
+        
+        Args:
+            df: Dataframe with engineered features (the one preprocess_features saw)
+            
+        Returns:
+            Fitted ColumnTransformer producing a DataFrame with the model's
+            feature names and order
+        """
+        def as_float32():
+            # Same float32 inputs as preprocess_features, so the scaler's
+            # statistics (and the outputs) match it exactly
+            return FunctionTransformer(
+                np.asarray, kw_args={'dtype': np.float32}, feature_names_out='one-to-one'
+            )
+        
+        preprocessor = ColumnTransformer(
+            [
+                ('num', make_pipeline(as_float32(), StandardScaler()), NUMERICAL_FEATURES),
+                ('cat', make_pipeline(
+                    SimpleImputer(strategy='constant', fill_value=MISSING_CATEGORY),
+                    OrdinalEncoder(
+                        categories=[list(self.categories_[col]) for col in CATEGORICAL_FEATURES],
+                        handle_unknown='use_encoded_value',
+                        unknown_value=-1,
+                        dtype=np.float32
+                    )
+                ), CATEGORICAL_FEATURES),
+                ('bin', as_float32(), BINARY_FEATURES)
+            ],
+            verbose_feature_names_out=False
+        ).set_output(transform='pandas')
+        return preprocessor.fit(df)
+    
+    def _split_cache_path(self, test_size, random_state):
+        """Cache file for a split, keyed on the source CSV's identity and split args"""
+        stat = self.data_path.stat()
+        key = hashlib.md5(
+            f"{self.data_path.resolve()}|{stat.st_mtime_ns}|{stat.st_size}|"
+            f"{test_size}|{random_state}|v{SPLIT_CACHE_VERSION}".encode()
+        ).hexdigest()
+        return self.cache_dir / f"split_{key}.joblib"
+    
+    def get_train_test_split(self, test_size=0.2, random_state=42, use_cache=True):
         """
         Load, preprocess, and split data.
         
+        The fitted preprocessing is also kept as a ColumnTransformer in
+        self.preprocessor (see build_preprocessor) for serving pipelines.
+        
+        The result (and fitted encoders/scaler) is cached on disk, so running
+        the trainers one after another only parses and preprocesses the CSV
+        once, and kept in memory so trainers sharing a process load it once.
+        The cache is invalidated when the CSV changes.
+        
         Args:
             test_size: Proportion for test set
             random_state: Random seed for reproducibility
+            use_cache: Reuse/store the preprocessed split on disk
             
         Returns:
             X_train, X_test, y_train, y_test, feature_names
         """
+        cache_path = self._split_cache_path(test_size, random_state)
+        if use_cache and (cache_path in _split_memo or cache_path.exists()):
+            if cache_path not in _split_memo:
+                _split_memo[cache_path] = joblib.load(cache_path)
+                print(f"📦 Loaded cached train/test split: {cache_path.name}")
+            cached = _split_memo[cache_path]
+            self.categories_ = cached['categories']
+            self.scaler = cached['scaler']
+            self.preprocessor = cached['preprocessor']
+            return cached['split']
+        
         # Load data
         df = self.load_data()
         
@@ -174,18 +416,39 @@ class DataLoader:
         
         # Preprocess
         X, y, feature_names = self.preprocess_features(df, fit=True)
+        self.preprocessor = self.build_preprocessor(df)
         
-        # Split
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=test_size, random_state=random_state, stratify=y
+        # Split (same indices as train_test_split(stratify=y)), slicing the
+        # underlying arrays once instead of going through pandas indexing
+        splitter = StratifiedShuffleSplit(
+            n_splits=1, test_size=test_size, random_state=random_state
         )
+        (train_idx, test_idx), = splitter.split(np.zeros(len(y)), y)
+        X_values = X.to_numpy(copy=False)
+        y_values = y.to_numpy()
+        X_train = pd.DataFrame(X_values[train_idx], columns=feature_names, copy=False)
+        X_test = pd.DataFrame(X_values[test_idx], columns=feature_names, copy=False)
+        y_train = pd.Series(y_values[train_idx], name=y.name, copy=False)
+        y_test = pd.Series(y_values[test_idx], name=y.name, copy=False)
         
         print(f"\n📊 Dataset Split:")
         print(f"   Training: {len(X_train):,} samples ({y_train.sum():,} abandoned)")
         print(f"   Testing: {len(X_test):,} samples ({y_test.sum():,} abandoned)")
         print(f"   Abandonment rate: {y.mean()*100:.1f}%")
         
-        return X_train, X_test, y_train, y_test, feature_names
+        split = (X_train, X_test, y_train, y_test, feature_names)
+        if use_cache:
+            cached = {
+                'split': split,
+                'categories': self.categories_,
+                'scaler': self.scaler,
+                'preprocessor': self.preprocessor
+            }
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            joblib.dump(cached, cache_path)
+            _split_memo[cache_path] = cached
+        
+        return split
 
 
 # Test if run directly
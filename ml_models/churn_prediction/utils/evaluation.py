@@ -4,35 +4,101 @@ Common metrics and reporting functions for all models.
 """
 
 import json
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
+import orjson
 from pathlib import Path
 from sklearn.metrics import (
-    accuracy_score,
-    precision_score,
-    recall_score,
-    f1_score,
     roc_auc_score,
     confusion_matrix,
     classification_report
 )
-import matplotlib.pyplot as plt
-import seaborn as sns
 
+# joblib compression for saved models: lz4 (de)compresses near memory speed
+MODEL_COMPRESSION = ('lz4', 3)
 
-def convert_to_python_types(obj):
-    """Convert numpy types to Python native types for JSON serialization"""
-    if isinstance(obj, dict):
-        return {key: convert_to_python_types(value) for key, value in obj.items()}
-    elif isinstance(obj, list):
-        return [convert_to_python_types(item) for item in obj]
-    elif isinstance(obj, (np.integer, np.int32, np.int64)):
-        return int(obj)
-    elif isinstance(obj, (np.floating, np.float32, np.float64)):
-        return float(obj)
-    elif isinstance(obj, np.ndarray):
+
+def json_default(obj):
+    """
+    json.dump hook for NumPy values.
+    
+    Only called for objects json can't serialize itself, so plain Python
+    values in the results are written without being copied first.
+    """
+    if isinstance(obj, np.ndarray):
         return obj.tolist()
-    else:
-        return obj
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _read_results(path):
+    """Parse a results JSON file, or None if it doesn't exist"""
+    return orjson.loads(path.read_bytes()) if path.exists() else None
+
+
+def load_results(model_names):
+    """
+    Load saved results for several models concurrently.
+    
+    Args:
+        model_names: Model names (e.g., ['random_forest', 'xgboost'])
+        
+    Returns:
+        Dictionary mapping model name to its results, or None if not saved yet
+    """
+    results_dir = Path(__file__).parent.parent / "results"
+    paths = [results_dir / f"{name}_results.json" for name in model_names]
+    with ThreadPoolExecutor(max_workers=max(1, len(paths))) as executor:
+        return dict(zip(model_names, executor.map(_read_results, paths)))
+
+
+def classification_metrics(y_true, y_pred):
+    """
+    Accuracy, precision, recall and F1 from a single confusion matrix.
+    
+    The scalar metrics are all ratios of the TN/FP/FN/TP counts, so the
+    labels are scanned once instead of once per metric. Undefined ratios
+    are 0, as with scikit-learn's zero_division default.
+    
+    Args:
+        y_true: True labels (0/1)
+        y_pred: Predicted labels (0/1)
+        
+    Returns:
+        Dictionary with accuracy, precision, recall, f1_score and confusion_matrix
+    """
+    cm = confusion_matrix(y_true, y_pred, labels=[0, 1])
+    tn, fp, fn, tp = cm.ravel().tolist()
+    
+    return {
+        'accuracy': (tp + tn) / cm.sum().item(),
+        'precision': tp / (tp + fp) if tp + fp else 0.0,
+        'recall': tp / (tp + fn) if tp + fn else 0.0,
+        'f1_score': 2 * tp / (2 * tp + fp + fn) if tp else 0.0,
+        'confusion_matrix': cm
+    }
+
+
+def top_features(feature_names, importances, k=10):
+    """
+    Get the k most important features, most important first.
+    
+    Args:
+        feature_names: Feature names in column order
+        importances: Importance per feature (e.g. model.feature_importances_)
+        k: Number of features to return
+        
+    Returns:
+        List of (feature_name, importance) tuples
+    """
+    importances = np.asarray(importances)
+    k = min(k, len(importances))
+    
+    # O(n) partition for the top k, then sort only those k
+    idx = np.argpartition(-importances, k - 1)[:k]
+    idx = idx[np.argsort(-importances[idx], kind='stable')]
+    return [(feature_names[i], importances[i]) for i in idx]
 
 
 class ModelEvaluator:
@@ -66,14 +132,10 @@ class ModelEvaluator:
         """
         print(f"\n📊 Evaluating {self.model_name}...")
         
-        # Calculate metrics
+        # Calculate metrics (all from one confusion matrix)
         self.results = {
             'model_name': self.model_name,
-            'accuracy': float(accuracy_score(y_true, y_pred)),
-            'precision': float(precision_score(y_true, y_pred)),
-            'recall': float(recall_score(y_true, y_pred)),
-            'f1_score': float(f1_score(y_true, y_pred)),
-            'confusion_matrix': confusion_matrix(y_true, y_pred).tolist()
+            **classification_metrics(y_true, y_pred)
         }
         
         # ROC AUC if probabilities provided
@@ -101,29 +163,54 @@ class ModelEvaluator:
         if additional_info:
             self.results.update(additional_info)
         
-        # Convert all numpy types to Python types
-        serializable_results = convert_to_python_types(self.results)
-        
-        # Save to JSON
+        # Save to JSON (NumPy values are converted by the default hook)
         json_path = self.results_dir / f"{self.model_name}_results.json"
         with open(json_path, 'w') as f:
-            json.dump(serializable_results, f, indent=2)
+            json.dump(self.results, f, indent=2, default=json_default)
         
         print(f"💾 Results saved to: {json_path}")
+    
+    def save_feature_importances(self, feature_names, importances):
+        """
+        Save all feature importances as a NumPy structured array.
+        
+        One (name, importance) record per feature, written with a single
+        np.save; load with np.load(path).
+        
+        Args:
+            feature_names: Feature names in column order
+            importances: Importance per feature
+        """
+        dtype = np.dtype([('name', 'U64'), ('importance', 'f4')])
+        records = np.empty(len(feature_names), dtype=dtype)
+        records['name'] = feature_names
+        records['importance'] = importances
+        
+        npy_path = self.results_dir / f"{self.model_name}_feature_importances.npy"
+        np.save(npy_path, records)
+        
+        print(f"💾 Feature importances saved to: {npy_path}")
         
     def plot_confusion_matrix(self, y_true, y_pred):
         """Plot and save confusion matrix"""
+        # Imported here so runs that never plot skip matplotlib's import cost;
+        # Agg renders straight to file without a GUI backend
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+        from sklearn.metrics import ConfusionMatrixDisplay
+        
         cm = confusion_matrix(y_true, y_pred)
         
-        plt.figure(figsize=(8, 6))
-        sns.heatmap(cm, annot=True, fmt='d', cmap='Blues')
-        plt.title(f'Confusion Matrix - {self.model_name}')
-        plt.ylabel('True Label')
-        plt.xlabel('Predicted Label')
+        fig, ax = plt.subplots(figsize=(4, 3))
+        ConfusionMatrixDisplay(cm).plot(ax=ax, cmap='Blues', colorbar=False, values_format='d')
+        ax.set_title(f'Confusion Matrix - {self.model_name}')
+        ax.set_ylabel('True Label')
+        ax.set_xlabel('Predicted Label')
         
         # Save plot
         plot_path = self.results_dir / f"{self.model_name}_confusion_matrix.png"
-        plt.savefig(plot_path, dpi=150, bbox_inches='tight')
-        plt.close()
+        fig.savefig(plot_path, dpi=150, bbox_inches='tight')
+        plt.close(fig)
         
         print(f"📊 Confusion matrix saved to: {plot_path}")
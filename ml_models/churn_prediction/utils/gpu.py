@@ -0,0 +1,100 @@
+"""
+GPU Detection Utilities
+Lets the boosting trainers use a GPU when one is usable and fall back to CPU.
+"""
+
+import shutil
+import subprocess
+from contextlib import nullcontext
+from functools import lru_cache
+
+import numpy as np
+
+
+@lru_cache(maxsize=1)
+def nvidia_gpu_present() -> bool:
+    """Check whether nvidia-smi lists at least one GPU"""
+    if shutil.which('nvidia-smi') is None:
+        return False
+    try:
+        result = subprocess.run(
+            ['nvidia-smi', '-L'], capture_output=True, text=True, timeout=10
+        )
+    except (OSError, subprocess.SubprocessError):
+        return False
+    return result.returncode == 0 and 'GPU' in result.stdout
+
+
+@lru_cache(maxsize=1)
+def xgboost_device() -> str:
+    """
+    Pick the XGBoost device.
+    
+    Returns:
+        'cuda' if a GPU is present and XGBoost was built with CUDA, else 'cpu'
+    """
+    import xgboost as xgb
+    
+    if nvidia_gpu_present() and xgb.build_info().get('USE_CUDA', False):
+        return 'cuda'
+    return 'cpu'
+
+
+@lru_cache(maxsize=1)
+def cuml_random_forest():
+    """
+    Get cuML's GPU RandomForestClassifier if it can be used.
+    
+    Returns:
+        cuml.ensemble.RandomForestClassifier, or None if cuML or a GPU is missing
+    """
+    if not nvidia_gpu_present():
+        return None
+    try:
+        from cuml.ensemble import RandomForestClassifier
+    except ImportError:
+        return None
+    return RandomForestClassifier
+
+
+def array_api_context():
+    """
+    Context enabling scikit-learn's array API dispatch, so CV splitting and
+    scoring work on CuPy arrays without copying them back to the host.
+    
+    Returns:
+        sklearn.config_context, or a no-op context if dispatch is unsupported
+    """
+    import sklearn
+    
+    try:
+        sklearn.set_config(array_api_dispatch=True)
+    except (ImportError, TypeError, ValueError):
+        return nullcontext()
+    sklearn.set_config(array_api_dispatch=False)
+    return sklearn.config_context(array_api_dispatch=True)
+
+
+@lru_cache(maxsize=1)
+def lightgbm_device() -> str:
+    """
+    Pick the LightGBM device.
+    
+    LightGBM only supports device='gpu' when compiled with GPU support, so a
+    one-round fit on a tiny dataset is used as the probe.
+    
+    Returns:
+        'gpu' if a GPU build of LightGBM can train, else 'cpu'
+    """
+    if not nvidia_gpu_present():
+        return 'cpu'
+    
+    import lightgbm as lgb
+    
+    X = np.random.rand(64, 2)
+    y = np.arange(64) % 2
+    try:
+        lgb.LGBMClassifier(device='gpu', n_estimators=1, verbose=-1).fit(X, y)
+    except Exception:
+        return 'cpu'
+    return 'gpu'
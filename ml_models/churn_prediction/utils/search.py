@@ -0,0 +1,54 @@
+"""
+Hyperparameter Search Utilities
+Successive halving over boosting rounds for the native xgb.cv / lgb.cv searches.
+"""
+
+import math
+
+
+def successive_halving(candidates, evaluate, min_rounds=50, factor=3):
+    """
+    Pick the best candidate by successive halving on boosting rounds.
+    
+    Every candidate is scored with a small round budget; the best 1/factor
+    survive and the budget is multiplied by factor, until one candidate is
+    left or the budget covers every survivor's n_estimators. Short boostings
+    rank candidates well enough to drop the clearly bad ones cheaply.
+    
+    Args:
+        candidates: Parameter dicts, each with 'n_estimators' as its max rounds
+        evaluate: Function (params, num_boost_round) -> (score, rounds_used),
+            higher score is better; params exclude 'n_estimators'
+        min_rounds: Round budget of the first rung
+        factor: Per rung, keep 1/factor of the candidates and grow the budget factor-fold
+    
+    Returns:
+        best_params (without 'n_estimators'), best_score, best_rounds
+    """
+    survivors = [dict(candidate) for candidate in candidates]
+    budget = min_rounds
+    rung = 0
+    
+    while True:
+        max_rounds = max(params['n_estimators'] for params in survivors)
+        print(f"   Rung {rung}: {len(survivors)} candidates, "
+              f"up to {min(budget, max_rounds)} rounds")
+        
+        results = []
+        for params in survivors:
+            tree_params = {k: v for k, v in params.items() if k != 'n_estimators'}
+            score, rounds = evaluate(tree_params, min(budget, params['n_estimators']))
+            results.append((score, rounds, params))
+        results.sort(key=lambda result: result[0], reverse=True)
+        
+        if len(survivors) == 1 or budget >= max_rounds:
+            break
+        
+        n_keep = max(1, math.ceil(len(results) / factor))
+        survivors = [params for _, _, params in results[:n_keep]]
+        budget *= factor
+        rung += 1
+    
+    best_score, best_rounds, best_params = results[0]
+    best_params = {k: v for k, v in best_params.items() if k != 'n_estimators'}
+    return best_params, best_score, best_rounds
@@ -1,12 +1,17 @@
 # scripts/export_training_data.py
 
 """
-Export user_sessions data to CSV for ML training.
-Saves to ml-models/churn_prediction/data/training_data.csv
+Export user_sessions data to Parquet (Zstd) for ML training.
+Saves to ml-models/churn_prediction/data/training_data.parquet
+(pass --csv to also write training_data.csv)
 """
 
+import shutil
+import importlib.util
 import psycopg2
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import sys
 from pathlib import Path
 from datetime import datetime
@@ -16,12 +21,187 @@ project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from config.config import config
+from database.db_manager import postgres_uri
 
-def export_to_csv():
-    """Export user_sessions table to CSV"""
+# Rows per Parquet row group / server-side cursor fetch (Arrow's default batch size)
+PARQUET_BATCH_ROWS = 64 * 1024
+
+# Arrow type for each Postgres type OID in the export
+ARROW_TYPES = {
+    16: pa.bool_(),                         # boolean
+    20: pa.int64(),                         # bigint
+    21: pa.int16(),                         # smallint
+    23: pa.int32(),                         # integer
+    700: pa.float32(),                      # real
+    701: pa.float64(),                      # double precision
+    25: pa.string(),                        # text
+    1043: pa.string(),                      # varchar
+    1114: pa.timestamp('us'),               # timestamp
+    1184: pa.timestamp('us', tz='UTC'),     # timestamptz
+}
+
+EXPORT_COLUMNS = [
+    'session_id',
+    'user_id',
+    'start_time',
+    'end_time',
+    'last_activity',
+    'device_type',
+    'browser',
+    'page_views',
+    'products_viewed',
+    'unique_products_viewed',
+    'searches',
+    'cart_additions',
+    'cart_removals',
+    'cart_value',
+    'is_converted',
+    'purchase_value',
+    'is_cart_abandoned',
+    'abandonment_reason',
+    'time_in_cart_seconds',
+    'checkout_initiated',
+    'persona',
+    'session_duration_seconds',
+    'avg_time_per_page',
+    'bounce',
+    'created_at',
+    'updated_at'
+]
+
+BOOLEAN_COLUMNS = {'is_converted', 'is_cart_abandoned', 'checkout_initiated', 'bounce', 'abandoned'}
+
+# DECIMAL(10, 2) columns, exported as double precision so every reader gets floats
+DECIMAL_COLUMNS = {'cart_value', 'purchase_value', 'avg_time_per_page'}
+
+# FIX: actual abandonment (cart but no purchase)
+ABANDONED_SQL = "(cart_value > 0 AND NOT is_converted)"
+
+
+def export_query(csv_booleans: bool = False) -> str:
+    """
+    Build the export SELECT.
+    
+    Args:
+        csv_booleans: Write booleans as True/False text (COPY's CSV would
+            write t/f, which the training data loader doesn't parse as bool)
+    
+    Returns:
+        SQL query over user_sessions, ordered by start_time
+    """
+    def select(column, expression):
+        if column in DECIMAL_COLUMNS:
+            return f"{expression}::FLOAT8 AS {column}"
+        if csv_booleans and column in BOOLEAN_COLUMNS:
+            return f"initcap(({expression})::TEXT) AS {column}"
+        return expression if expression == column else f"{expression} AS {column}"
+    
+    columns = [select(column, column) for column in EXPORT_COLUMNS]
+    columns.append(select('abandoned', ABANDONED_SQL))
+    return "SELECT\n    {}\nFROM user_sessions\nORDER BY start_time".format(",\n    ".join(columns))
+
+
+def write_parquet(conn, output_file: Path) -> int:
+    """
+    Stream the export query into a Zstd-compressed Parquet file.
+    
+    Rows come from a server-side cursor one batch at a time, so memory stays
+    at one batch whatever the table size.
+    
+    Args:
+        conn: Open psycopg2 connection
+        output_file: Parquet file to write
+    
+    Returns:
+        Number of rows written
+    """
+    cursor = conn.cursor(name='export_sessions')
+    cursor.itersize = PARQUET_BATCH_ROWS
+    cursor.execute(export_query())
+    
+    # A named cursor only has a description after the first fetch
+    rows = cursor.fetchmany(PARQUET_BATCH_ROWS)
+    schema = pa.schema([
+        (column.name, ARROW_TYPES.get(column.type_code, pa.string()))
+        for column in cursor.description
+    ])
+    
+    n_rows = 0
+    with pq.ParquetWriter(output_file, schema, compression='zstd') as writer:
+        while rows:
+            columns = list(zip(*rows))
+            writer.write_batch(pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+            n_rows += len(rows)
+            rows = cursor.fetchmany(PARQUET_BATCH_ROWS)
+        if n_rows == 0:
+            writer.write_table(schema.empty_table())
+    
+    cursor.close()
+    return n_rows
+
+
+def write_parquet_adbc(output_file: Path) -> int:
+    """
+    Stream the export query into Parquet through the ADBC PostgreSQL driver.
+    
+    The driver decodes Postgres' binary COPY output straight into Arrow
+    record batches, so rows never become Python tuples.
+    
+    Args:
+        output_file: Parquet file to write
+    
+    Returns:
+        Number of rows written
+    """
+    import adbc_driver_postgresql.dbapi
+    
+    n_rows = 0
+    with adbc_driver_postgresql.dbapi.connect(postgres_uri()) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(export_query())
+            reader = cursor.fetch_record_batch()
+            with pq.ParquetWriter(output_file, reader.schema, compression='zstd') as writer:
+                for batch in reader:
+                    writer.write_batch(batch)
+                    n_rows += batch.num_rows
+                if n_rows == 0:
+                    writer.write_table(reader.schema.empty_table())
+    
+    return n_rows
+
+
+def write_csv(conn, output_file: Path):
+    """
+    Export the same rows as CSV with COPY.
+    
+    Postgres formats the CSV itself and the bytes are piped straight to the
+    file, without building Python rows.
+    
+    Args:
+        conn: Open psycopg2 connection
+        output_file: CSV file to write
+    """
+    cursor = conn.cursor()
+    with open(output_file, 'wb') as f:
+        cursor.copy_expert(
+            f"COPY ({export_query(csv_booleans=True)}) TO STDOUT WITH (FORMAT CSV, HEADER TRUE)", f
+        )
+    cursor.close()
+
+
+def export_training_data(csv: bool = False):
+    """
+    Export user_sessions table to Parquet (and optionally CSV).
+    
+    Args:
+        csv: Also write the CSV version of the export
+    """
     
     print("\n" + "="*60)
-    print("📤 EXPORTING TRAINING DATA TO CSV")
+    print("📤 EXPORTING TRAINING DATA")
     print("="*60)
     
     try:
@@ -35,62 +215,49 @@ def export_to_csv():
             password=config.POSTGRES_PASSWORD
         )
         
-        # Query all sessions
-        print("📊 Loading sessions from database...")
-        query = """
-            SELECT 
-                session_id,
-                user_id,
-                start_time,
-                end_time,
-                last_activity,
-                device_type,
-                browser,
-                page_views,
-                products_viewed,
-                unique_products_viewed,
-                searches,
-                cart_additions,
-                cart_removals,
-                cart_value,
-                is_converted,
-                purchase_value,
-                is_cart_abandoned,
-                abandonment_reason,
-                time_in_cart_seconds,
-                checkout_initiated,
-                persona,
-                session_duration_seconds,
-                avg_time_per_page,
-                bounce,
-                created_at,
-                updated_at
+        # Dataset statistics as aggregates, so no rows are loaded for them
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT
+                COUNT(*),
+                COUNT(*) FILTER (WHERE is_converted),
+                COUNT(*) FILTER (WHERE cart_value > 0 AND NOT is_converted),
+                COUNT(*) FILTER (WHERE cart_value > 0),
+                COUNT(*) FILTER (WHERE cart_value = 0 AND NOT is_converted),
+                COUNT(*) FILTER (WHERE NOT is_converted AND NOT cart_value > 0)
             FROM user_sessions
-            ORDER BY start_time
-        """
+        """)
+        total, purchased, abandoned, with_cart, just_browsing, browsing = cursor.fetchone()
         
-        df = pd.read_sql(query, conn)
-        conn.close()
+        cursor.execute("""
+            SELECT
+                persona,
+                COUNT(*) AS total,
+                COUNT(*) FILTER (WHERE is_converted) AS is_converted,
+                COUNT(*) FILTER (WHERE cart_value > 0 AND NOT is_converted) AS abandoned
+            FROM user_sessions
+            GROUP BY persona
+            ORDER BY persona
+        """)
+        persona_stats = pd.DataFrame(
+            cursor.fetchall(), columns=['persona', 'total', 'is_converted', 'abandoned']
+        ).set_index('persona')
+        cursor.close()
         
-        # FIX: Calculate actual abandonment (cart but no purchase)
-        df['abandoned'] = (df['cart_value'] > 0) & (~df['is_converted'])
+        def pct(count):
+            return count / total * 100 if total else 0.0
         
         # Print statistics
-        print(f"\n✅ Loaded {len(df):,} sessions")
+        print(f"\n✅ Found {total:,} sessions")
         print(f"\n📈 Dataset Statistics:")
-        print(f"  Total Sessions: {len(df):,}")
-        print(f"  Purchased: {df['is_converted'].sum():,} ({df['is_converted'].mean()*100:.1f}%)")
-        print(f"  Abandoned (cart > 0, not purchased): {df['abandoned'].sum():,} ({df['abandoned'].mean()*100:.1f}%)")
-        print(f"  With Cart: {(df['cart_value'] > 0).sum():,}")
-        print(f"  Just Browsing: {((df['cart_value'] == 0) & (~df['is_converted'])).sum():,}")
+        print(f"  Total Sessions: {total:,}")
+        print(f"  Purchased: {purchased:,} ({pct(purchased):.1f}%)")
+        print(f"  Abandoned (cart > 0, not purchased): {abandoned:,} ({pct(abandoned):.1f}%)")
+        print(f"  With Cart: {with_cart:,}")
+        print(f"  Just Browsing: {just_browsing:,}")
         
         # Breakdown by persona
         print(f"\n👥 By Persona:")
-        persona_stats = df.groupby('persona').agg({
-            'session_id': 'count',
-            'is_converted': 'sum',
-            'abandoned': 'sum'
-        }).rename(columns={'session_id': 'total'})
         print(persona_stats.to_string())
         
         # Create output directory
@@ -99,34 +266,64 @@ def export_to_csv():
         
         # Generate filename with timestamp
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        output_file = output_dir / f"training_data_{timestamp}.csv"
+        output_file = output_dir / f"training_data_{timestamp}.parquet"
         
-        # Save to CSV
         print(f"\n💾 Saving to: {output_file}")
-        df.to_csv(output_file, index=False)
+        if importlib.util.find_spec('adbc_driver_postgresql') is not None:
+            write_parquet_adbc(output_file)
+        else:
+            write_parquet(conn, output_file)
+        
+        # Also save as latest (copy the file rather than querying again)
+        latest_file = output_dir / "training_data_latest.parquet"
+        shutil.copyfile(output_file, latest_file)
         
-        # Also save as latest
-        latest_file = output_dir / "training_data_latest.csv"
-        df.to_csv(latest_file, index=False)
+        output_files = [output_file]
+        if csv:
+            csv_file = output_file.with_suffix('.csv')
+            print(f"💾 Saving CSV to: {csv_file}")
+            write_csv(conn, csv_file)
+            shutil.copyfile(csv_file, output_dir / "training_data_latest.csv")
+            output_files.append(csv_file)
         
-        file_size_mb = output_file.stat().st_size / (1024 * 1024)
+        # First rows for the preview
+        cursor = conn.cursor()
+        cursor.execute(f"""
+            SELECT
+                session_id,
+                persona,
+                device_type,
+                page_views,
+                cart_value,
+                is_converted,
+                {ABANDONED_SQL} AS abandoned,
+                session_duration_seconds
+            FROM user_sessions
+            ORDER BY start_time
+            LIMIT 5
+        """)
+        preview = pd.DataFrame(
+            cursor.fetchall(), columns=[column.name for column in cursor.description]
+        )
+        
+        cursor.close()
+        conn.close()
         
         print(f"✅ Export complete!")
-        print(f"  File size: {file_size_mb:.2f} MB")
+        for path in output_files:
+            print(f"  {path.suffix[1:].upper()} size: {path.stat().st_size / (1024 * 1024):.2f} MB")
         print(f"  Location: {output_file}")
         print(f"  Also saved as: {latest_file}")
         
         # Show preview
         print(f"\n📋 Data Preview (first 5 rows):")
-        preview_cols = ['session_id', 'persona', 'device_type', 'page_views', 
-                       'cart_value', 'is_converted', 'abandoned', 'session_duration_seconds']
-        print(df[preview_cols].head().to_string(index=False))
+        print(preview.to_string(index=False))
         
         # Show distribution
         print(f"\n📊 Target Distribution:")
-        print(f"  Purchased: {df['is_converted'].sum():,} ({df['is_converted'].mean()*100:.1f}%)")
-        print(f"  Abandoned: {df['abandoned'].sum():,} ({df['abandoned'].mean()*100:.1f}%)")
-        print(f"  Browsing: {((~df['is_converted']) & (~df['abandoned'])).sum():,} ({((~df['is_converted']) & (~df['abandoned'])).mean()*100:.1f}%)")
+        print(f"  Purchased: {purchased:,} ({pct(purchased):.1f}%)")
+        print(f"  Abandoned: {abandoned:,} ({pct(abandoned):.1f}%)")
+        print(f"  Browsing: {browsing:,} ({pct(browsing):.1f}%)")
         
         return output_file
         
@@ -136,4 +333,4 @@ def export_to_csv():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    export_to_csv()
+    export_training_data(csv='--csv' in sys.argv[1:])
@@ -1,14 +1,37 @@
+import csv
+import io
 import logging
 import requests
-from datetime import datetime, timezone
-from psycopg2.extras import execute_values
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 logger = logging.getLogger(__name__)
 
+PREDICTION_COLUMNS = (
+    "session_id, user_id, prediction_timestamp, "
+    "abandonment_probability, predicted_abandoned, "
+    "risk_level, intervention_triggered, "
+    "intervention_type, model_version, "
+    "prediction_latency_ms"
+)
+
 class MLInferenceService:
-    def __init__(self, pg_conn, model_url: str = "http://localhost:8000/predict"):
+    def __init__(self, pg_conn, model_url: str = "http://localhost:8000/predict",
+                 batch_url: str = "http://localhost:8000/predict_batch"):
         self.pg_conn = pg_conn
         self.model_url = model_url
+        self.batch_url = batch_url
+
+        # One pooled keep-alive session, so calls reuse connections instead of
+        # paying a TCP handshake per prediction
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=64,
+            max_retries=Retry(total=2, backoff_factor=0.1)
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
 
     def call_ml_api(self, session_record: dict):
         """Call ML API and get abandonment prediction."""
@@ -16,7 +39,7 @@ class MLInferenceService:
             if session_record.get("cart_value", 0) <= 0:
                 return None
 
-            resp = requests.post(self.model_url, json=session_record, timeout=3)
+            resp = self.session.post(self.model_url, json=session_record, timeout=3)
             if resp.status_code != 200:
                 logger.error(f"ML API returned {resp.status_code}")
                 return None
@@ -27,41 +50,75 @@ class MLInferenceService:
             logger.error(f"ML API call failed: {exc}")
             return None
 
-    def log_prediction(self, record: dict, result: dict, latency_ms: float):
-        """Log prediction result into ml_predictions table."""
+    def predict_batch(self, session_records: list):
+        """Call the ML API once for many sessions. Returns predictions aligned with the records (None if skipped or failed)."""
+        predictions = [None] * len(session_records)
+        indices = [i for i, record in enumerate(session_records) if record.get("cart_value", 0) > 0]
+        if not indices:
+            return predictions
+
+        try:
+            resp = self.session.post(
+                self.batch_url, json=[session_records[i] for i in indices], timeout=3
+            )
+            if resp.status_code != 200:
+                logger.error(f"ML API returned {resp.status_code}")
+                return predictions
+
+            for i, prediction in zip(indices, resp.json()):
+                predictions[i] = prediction
+
+        except Exception as exc:
+            logger.error(f"ML API batch call failed: {exc}")
+
+        return predictions
+
+    def log_predictions(self, predictions: list):
+        """Log a batch of (record, result, latency_ms, prediction_timestamp) predictions into ml_predictions with one COPY."""
+        if not predictions:
+            return
         if self.pg_conn is None:
-            logger.error("Postgres connection is None, cannot log prediction")
+            logger.error("Postgres connection is None, cannot log predictions")
             return
 
         try:
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for record, result, latency_ms, prediction_timestamp in predictions:
+                writer.writerow((
+                    record.get("session_id"),
+                    record.get("user_id"),
+                    prediction_timestamp,
+                    result.get("abandonment_probability"),
+                    result.get("will_abandon", True),
+                    result.get("risk_level"),
+                    True if result.get("risk_level") in ["HIGH", "CRITICAL"] else False,
+                    result.get("recommended_intervention"),
+                    result.get("model_version", "random_forest_v1"),
+                    int(latency_ms)
+                ))
+            buffer.seek(0)
+
+            # COPY into a per-connection staging table, then move the rows over
+            # with INSERT ... ON CONFLICT DO NOTHING (COPY itself can't skip conflicts)
             cursor = self.pg_conn.cursor()
-            query = """
-                INSERT INTO ml_predictions (
-                    session_id, user_id, prediction_timestamp,
-                    abandonment_probability, predicted_abandoned,
-                    risk_level, intervention_triggered,
-                    intervention_type, model_version,
-                    prediction_latency_ms
-                )
-                VALUES %s
+            cursor.execute(f"""
+                CREATE TEMP TABLE IF NOT EXISTS ml_predictions_staging
+                ON COMMIT DELETE ROWS AS
+                SELECT {PREDICTION_COLUMNS} FROM ml_predictions WITH NO DATA
+            """)
+            cursor.copy_expert(
+                f"COPY ml_predictions_staging ({PREDICTION_COLUMNS}) FROM STDIN WITH (FORMAT CSV)",
+                buffer
+            )
+            cursor.execute(f"""
+                INSERT INTO ml_predictions ({PREDICTION_COLUMNS})
+                SELECT {PREDICTION_COLUMNS} FROM ml_predictions_staging
                 ON CONFLICT DO NOTHING
-            """
-            data = [(
-                record.get("session_id"),
-                record.get("user_id"),
-                datetime.now(timezone.utc),
-                result.get("abandonment_probability"),
-                result.get("will_abandon", True),
-                result.get("risk_level"),
-                True if result.get("risk_level") in ["HIGH", "CRITICAL"] else False,
-                result.get("recommended_intervention"),
-                result.get("model_version", "random_forest_v1"),
-                int(latency_ms)
-            )]
-            execute_values(cursor, query, data)
+            """)
             self.pg_conn.commit()
             cursor.close()
-            logger.info(f"🧠 Prediction logged: {record.get('session_id')} → {result.get('risk_level')} ({result.get('abandonment_probability')*100:.1f}%)")
+            logger.info(f"🧠 {len(predictions)} predictions logged")
 
         except Exception as exc:
             try:
@@ -13,10 +13,18 @@ sys.path.insert(0, str(project_root))
 from streaming.flink_jobs.stream_processor_base import StreamProcessor
 from config.config import config
 from streaming.flink_jobs.ml_inference_service import MLInferenceService
+from data_ingestion.schemas.event_schemas import USER_DECODER
 
 logger = logging.getLogger(__name__)
 
+def event_time(event: dict) -> datetime:
+    """Naive UTC datetime of an event's epoch-nanosecond timestamp"""
+    return datetime.fromtimestamp(event['timestamp_ns'] / 1e9, timezone.utc).replace(tzinfo=None)
+
 class SessionAggregator(StreamProcessor):
+    # Validate user events straight from the Kafka bytes
+    EVENT_DECODER = USER_DECODER
+
     def __init__(self):
         super().__init__(
             job_name="session-aggregator",
@@ -41,6 +49,10 @@ class SessionAggregator(StreamProcessor):
         })
         # ML service will be initialized after DB connection is established
         self.ml_service = None
+        # ML payloads and abandonment outcomes of the current aggregation pass,
+        # scored and written to ml_predictions in one batch by flush_window_results
+        self.pending_payloads: List[dict] = []
+        self.pending_abandoned: List[str] = []
 
     def start(self):
         """Override start to initialize ML service after DB connection"""
@@ -62,10 +74,7 @@ class SessionAggregator(StreamProcessor):
                 return None
             
             if event_type == 'session_start':
-                timestamp_str = event.get('timestamp')
-                self.session_starts[session_id] = datetime.fromisoformat(
-                    timestamp_str.replace('Z', '+00:00')
-                ).replace(tzinfo=None)
+                self.session_starts[session_id] = event_time(event)
                 persona = event.get('persona')
                 if persona:
                     self.session_metrics[session_id]['persona'] = persona
@@ -159,7 +168,7 @@ class SessionAggregator(StreamProcessor):
             if not start_time:
                 start_time = datetime.now(timezone.utc).replace(tzinfo=None)
                 self.session_starts[session_id] = start_time
-            last_activity = datetime.fromisoformat(last_event.get('timestamp', '').replace('Z', '+00:00')).replace(tzinfo=None)
+            last_activity = event_time(last_event)
             duration_seconds = int((last_activity - start_time).total_seconds())
             page_views = metrics.get('page_views', 0)
             avg_time_per_page = duration_seconds / page_views if page_views > 0 else 0
@@ -219,44 +228,14 @@ class SessionAggregator(StreamProcessor):
                 "checkout_initiated": bool(checkout_initiated)
             }
 
-            # Call ML API only if ML service is initialized AND cart has value
-            prediction = None
+            # Queue for ML scoring only if ML service is initialized AND cart has value
             if self.ml_service and cart_value > 0:
-                start_time_predict = time.time()
-                prediction = self.ml_service.call_ml_api(ml_payload)
-
-                if prediction:
-                    latency_ms = (time.time() - start_time_predict) * 1000
-                    self.ml_service.log_prediction(ml_payload, prediction, latency_ms)
-
-                    if prediction.get('risk_level') in ['HIGH', 'CRITICAL']:
-                        logger.warning(
-                            f"⚠️ HIGH RISK ABANDONMENT: session {session_id} "
-                            f"(probability: {prediction.get('abandonment_probability')*100:.2f}%) "
-                            f"recommended: {prediction.get('recommended_intervention')}"
-                        )
+                self.pending_payloads.append(ml_payload)
             
             # NEW: If session ended with abandonment, mark prediction as correct
+            # (batched with the pass's predictions in flush_window_results)
             if is_cart_abandoned and self.pg_conn:
-                try:
-                    cursor = self.pg_conn.cursor()
-                    update_query = """
-                        UPDATE ml_predictions
-                        SET actual_outcome = 'abandoned',
-                            was_prediction_correct = CASE 
-                                WHEN predicted_abandoned = TRUE THEN TRUE
-                                ELSE FALSE
-                            END
-                        WHERE session_id = %s
-                        AND actual_outcome IS NULL
-                    """
-                    cursor.execute(update_query, (session_id,))
-                    self.pg_conn.commit()
-                    cursor.close()
-                except Exception as e:
-                    logger.error(f"Error updating abandonment outcome: {e}")
-                    if self.pg_conn:
-                        self.pg_conn.rollback()
+                self.pending_abandoned.append(session_id)
 
             session_record = {
                 'session_id': session_id,
@@ -305,6 +284,58 @@ class SessionAggregator(StreamProcessor):
             traceback.print_exc()
             return None
 
+    def flush_window_results(self):
+        """Score the pass's sessions with one ML API call, insert the predictions with one COPY, then record abandonment outcomes with one UPDATE."""
+        if self.pending_payloads:
+            payloads, self.pending_payloads = self.pending_payloads, []
+            if self.ml_service:
+                self.log_batch_predictions(payloads)
+
+        if self.pending_abandoned and self.pg_conn:
+            session_ids, self.pending_abandoned = self.pending_abandoned, []
+            try:
+                cursor = self.pg_conn.cursor()
+                update_query = """
+                    UPDATE ml_predictions
+                    SET actual_outcome = 'abandoned',
+                        was_prediction_correct = CASE 
+                            WHEN predicted_abandoned = TRUE THEN TRUE
+                            ELSE FALSE
+                        END
+                    WHERE session_id = ANY(%s)
+                    AND actual_outcome IS NULL
+                """
+                cursor.execute(update_query, (session_ids,))
+                self.pg_conn.commit()
+                cursor.close()
+            except Exception as e:
+                logger.error(f"Error updating abandonment outcomes: {e}")
+                if self.pg_conn:
+                    self.pg_conn.rollback()
+
+    def log_batch_predictions(self, payloads: List[dict]):
+        """Predict all queued sessions in one request and log the results."""
+        start_time_predict = time.time()
+        results = self.ml_service.predict_batch(payloads)
+        # Every prediction in the batch shares the round trip's latency
+        latency_ms = (time.time() - start_time_predict) * 1000
+        prediction_timestamp = datetime.now(timezone.utc)
+
+        predictions = []
+        for payload, prediction in zip(payloads, results):
+            if not prediction:
+                continue
+            predictions.append((payload, prediction, latency_ms, prediction_timestamp))
+
+            if prediction.get('risk_level') in ['HIGH', 'CRITICAL']:
+                logger.warning(
+                    f"⚠️ HIGH RISK ABANDONMENT: session {payload['session_id']} "
+                    f"(probability: {prediction.get('abandonment_probability')*100:.2f}%) "
+                    f"recommended: {prediction.get('recommended_intervention')}"
+                )
+
+        self.ml_service.log_predictions(predictions)
+
     def _extract_key(self, event: dict) -> str:
         return event.get('session_id', 'unknown')
 
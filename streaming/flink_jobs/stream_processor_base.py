@@ -6,6 +6,7 @@ This is a custom implementation that replaces PyFlink for Python 3.12 compatibil
 
 import logging
 import json
+import queue
 import time
 import threading
 from typing import Dict, List, Callable, Any, Optional
@@ -20,10 +21,12 @@ project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
 
 from kafka import KafkaConsumer
+import msgspec
 import psycopg2
 from psycopg2.extras import execute_batch
 import redis
 from config.config import config
+from data_ingestion.schemas.event_schemas import event_loads
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +44,8 @@ class Window:
         """
         self.duration = duration_seconds
         self.slide = slide_seconds
+        # Entries are (timestamp, event) tuples; a tuple is far smaller than
+        # a per-event dict and the window holds every event in its duration
         self.data: Dict[str, deque] = defaultdict(deque)
         self.lock = threading.Lock()
     
@@ -48,25 +53,23 @@ class Window:
         """Add event to window"""
         with self.lock:
             now = datetime.now(timezone.utc).replace(tzinfo=None)
-            self.data[key].append({
-                'event': event,
-                'timestamp': now
-            })
+            self.data[key].append((now, event))
             # Remove expired events
             self._cleanup_expired(key, now)
     
     def _cleanup_expired(self, key: str, now: datetime):
         """Remove events older than window duration"""
         cutoff = now - timedelta(seconds=self.duration)
-        while self.data[key] and self.data[key][0]['timestamp'] < cutoff:
-            self.data[key].popleft()
+        entries = self.data[key]
+        while entries and entries[0][0] < cutoff:
+            entries.popleft()
     
     def get_window_data(self, key: str) -> List[dict]:
         """Get all events in current window for key"""
         with self.lock:
             now = datetime.now(timezone.utc).replace(tzinfo=None)
             self._cleanup_expired(key, now)
-            return [item['event'] for item in self.data[key]]
+            return [event for _, event in self.data[key]]
     
     def get_all_keys(self) -> List[str]:
         """Get all active keys in window"""
@@ -106,6 +109,15 @@ class StateStore:
 class StreamProcessor(ABC):
     """Base class for stream processing jobs"""
     
+    # Fetched batches buffered between a consumer's poll and decode stages
+    FETCH_QUEUE_SIZE = 4
+    
+    # Max seconds between offset commits while the fetch queue never drains
+    COMMIT_INTERVAL = 5.0
+    
+    # msgspec decoder validating this job's input events; None keeps plain dicts
+    EVENT_DECODER: Optional[msgspec.json.Decoder] = None
+    
     def __init__(
         self,
         job_name: str,
@@ -147,9 +159,11 @@ class StreamProcessor(ABC):
             *self.input_topics,
             bootstrap_servers=config.KAFKA_BOOTSTRAP_SERVERS,
             auto_offset_reset='earliest',
-            enable_auto_commit=True,
+            # Offsets are committed by _consumer_loop once fetched batches are
+            # processed; auto-commit would also commit batches still queued
+            enable_auto_commit=False,
             group_id=f'{self.job_name}-consumer-group',
-            value_deserializer=lambda x: json.loads(x.decode('utf-8')),
+            # Values stay raw bytes; decoding runs on the consumer's process thread
             consumer_timeout_ms=1000  # 1 second timeout for graceful shutdown
         )
     
@@ -214,6 +228,13 @@ class StreamProcessor(ABC):
         """
         pass
     
+    def flush_window_results(self):
+        """
+        Called after each aggregation pass (and on stop).
+        Override to write results buffered by process_window in one batch.
+        """
+        pass
+    
     def sink_to_postgres(self, table: str, data: List[dict]):
         """
         Batch insert data to PostgreSQL.
@@ -271,11 +292,29 @@ class StreamProcessor(ABC):
             logger.error(f"Error writing to Redis: {e}")
     
     def _consumer_loop(self, consumer_id: int):
-        """Main consumer loop for processing events"""
+        """
+        Main consumer loop for processing events.
+        
+        Polls Kafka and hands raw message batches to a companion process
+        thread through a bounded queue, so the next fetch overlaps with
+        decoding and processing of the previous one. Offsets are committed
+        only when every fetched batch has been processed (at-least-once).
+        """
         consumer = self._create_kafka_consumer(consumer_id)
+        batches: queue.Queue = queue.Queue(maxsize=self.FETCH_QUEUE_SIZE)
+        
+        process_thread = threading.Thread(
+            target=self._process_loop,
+            args=(batches,),
+            name=f"{self.job_name}-process-{consumer_id}"
+        )
+        process_thread.daemon = True
+        process_thread.start()
         
         logger.info(f"Consumer {consumer_id} started")
         
+        uncommitted = False
+        last_commit = time.monotonic()
         try:
             while self.running:
                 try:
@@ -283,18 +322,25 @@ class StreamProcessor(ABC):
                     messages = consumer.poll(timeout_ms=1000)
                     
                     for topic_partition, records in messages.items():
-                        for record in records:
+                        batch = [record.value for record in records]
+                        while self.running:
                             try:
-                                # Process single event
-                                result = self.process_event(record.value)
-                                
-                                if result:
-                                    # Add to window for aggregation
-                                    key = self._extract_key(record.value)
-                                    self.window.add_event(key, record.value)
-                                
-                            except Exception as e:
-                                logger.error(f"Error processing event: {e}")
+                                batches.put(batch, timeout=1)
+                                uncommitted = True
+                                break
+                            except queue.Full:
+                                continue
+                    
+                    # Only this thread enqueues, so once the queue has no
+                    # unfinished batches every polled record is processed and
+                    # the consumer's positions are safe to commit
+                    if uncommitted:
+                        if time.monotonic() - last_commit >= self.COMMIT_INTERVAL:
+                            batches.join()
+                        if batches.unfinished_tasks == 0:
+                            consumer.commit()
+                            uncommitted = False
+                            last_commit = time.monotonic()
                     
                 except Exception as e:
                     if self.running:  # Only log if not shutting down
@@ -302,9 +348,71 @@ class StreamProcessor(ABC):
                         time.sleep(1)
                 
         finally:
-            consumer.close()
+            # Drain what was already fetched, then stop the process thread
+            batches.put(None)
+            process_thread.join(timeout=5)
+            if uncommitted and batches.unfinished_tasks == 0:
+                try:
+                    consumer.commit()
+                except Exception as e:
+                    logger.error(f"Consumer {consumer_id} final commit failed: {e}")
+            consumer.close(autocommit=False)
             logger.info(f"Consumer {consumer_id} stopped")
     
+    def _process_loop(self, batches: queue.Queue):
+        """
+        Decode and process raw message batches until a None sentinel arrives.
+        
+        Every batch (and the sentinel) is marked task_done once handled, which
+        is what lets _consumer_loop commit its offsets.
+        """
+        while True:
+            batch = batches.get()
+            if batch is None:
+                batches.task_done()
+                return
+            
+            for raw_value in batch:
+                try:
+                    event = self.decode_event(raw_value)
+                    
+                    # Process single event
+                    result = self.process_event(event)
+                    
+                    if result:
+                        # Add to window for aggregation
+                        key = self._extract_key(event)
+                        self.window.add_event(key, event)
+                    
+                except Exception as e:
+                    logger.error(f"Error processing event: {e}")
+            
+            batches.task_done()
+    
+    def decode_event(self, raw_value: bytes) -> dict:
+        """
+        Decode a raw Kafka message value into an event dictionary.
+        
+        With EVENT_DECODER set, the payload is validated against its schema
+        in the same pass (invalid events raise msgspec.ValidationError).
+        
+        Args:
+            raw_value: Message value bytes
+            
+        Returns:
+            Event dictionary
+        """
+        if self.EVENT_DECODER is None:
+            return event_loads(raw_value)
+        
+        event = self.EVENT_DECODER.decode(raw_value)
+        record = msgspec.structs.asdict(event)
+        struct_config = event.__struct_config__
+        if struct_config.tag_field:
+            # The tag isn't a struct field, so put it back for process_event
+            record[struct_config.tag_field] = struct_config.tag
+        return record
+    
     def _aggregation_loop(self):
         """Periodic aggregation of windowed data"""
         logger.info("Aggregation loop started")
@@ -321,6 +429,9 @@ class StreamProcessor(ABC):
                         if result:
                             logger.debug(f"Aggregated {len(events)} events for key: {key}")
                 
+                # Write anything the pass buffered in one batch
+                self.flush_window_results()
+                
                 # Sleep for slide interval
                 time.sleep(self.window.slide)
                 
@@ -390,6 +501,12 @@ class StreamProcessor(ABC):
         for thread in self.threads:
             thread.join(timeout=5)
         
+        # Write results buffered by the last aggregation pass
+        try:
+            self.flush_window_results()
+        except Exception as e:
+            logger.error(f"Error flushing window results: {e}")
+        
         # Close connections
         if self.pg_conn:
             self.pg_conn.close()
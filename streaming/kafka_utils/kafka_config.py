@@ -4,11 +4,11 @@ Handles Kafka connection, topic creation, and producer/consumer setup.
 """
 
 import logging
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Union
 from confluent_kafka import Producer, Consumer, KafkaException
 from confluent_kafka.admin import AdminClient, NewTopic
-import json
 from config.config import config
+from data_ingestion.schemas.event_schemas import event_dumps
 
 logger = logging.getLogger(__name__)
 
@@ -39,9 +39,12 @@ class KafkaManager:
                 'client.id': 'ecommerce-producer',
                 'acks': 'all',
                 'retries': 3,
-                'compression.type': 'gzip',
-                'linger.ms': 10,
-                'batch.size': 16384
+                'compression.type': 'lz4',
+                'linger.ms': 50,
+                'batch.num.messages': 10000,
+                'batch.size': 16384,
+                # Room for bursts since callers poll(0) rather than flush()
+                'queue.buffering.max.messages': 1000000
             }
             
             producer = Producer(producer_config)
@@ -161,7 +164,7 @@ class KafkaManager:
         self, 
         producer: Producer, 
         topic: str, 
-        message: dict,
+        message: Union[dict, bytes],
         key: Optional[str] = None
     ) -> bool:
         """
@@ -170,15 +173,18 @@ class KafkaManager:
         Args:
             producer: Producer instance
             topic: Topic name
-            message: Message dictionary
+            message: Message dictionary or pre-serialized JSON bytes
             key: Optional message key for partitioning
             
         Returns:
             True if successful, False otherwise
         """
         try:
-            # Serialize message to JSON
-            value = json.dumps(message).encode('utf-8')
+            # Serialize message to JSON (naive datetimes are sent as UTC)
+            if isinstance(message, bytes):
+                value = message
+            else:
+                value = event_dumps(message)
             key_bytes = key.encode('utf-8') if key else None
             
             # Produce message
@@ -273,7 +279,7 @@ if __name__ == "__main__":
     
     test_message = {
         "test": "Hello Kafka!",
-        "timestamp": "2025-10-15T09:50:00Z"
+        "timestamp_ns": 1760521800000000000
     }
     
     success = manager.send_message(